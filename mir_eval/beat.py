@@ -29,6 +29,8 @@ Metrics
 * :func:`mir_eval.beat.f_measure`: The F-measure of the beat sequence, where an
   estimated beat is considered correct if it is sufficiently close to a
   reference beat
+* :func:`mir_eval.beat.f_measure_sweep`: The beat F-measure for a range of
+  window sizes, computed in a single matching pass
 * :func:`mir_eval.beat.cemgil`: Cemgil's score, which computes the sum of
   Gaussian errors for each beat
 * :func:`mir_eval.beat.goto`: Goto's score, a binary score which is 1 when at
@@ -178,6 +180,59 @@ def f_measure(reference_beats,
     return util.f_measure(precision, recall)
 
 
+def f_measure_sweep(reference_beats,
+                    estimated_beats,
+                    f_measure_thresholds):
+    """Compute the F-measure of correct vs incorrectly predicted beats for
+    each of several window sizes.
+
+    This produces the same scores as calling :func:`f_measure` once per
+    window, but the candidate beat pairings are only computed once and the
+    matching for each window is grown from the matching of the next smaller
+    window.
+
+    Examples
+    --------
+    >>> reference_beats = mir_eval.io.load_events('reference.txt')
+    >>> reference_beats = mir_eval.beat.trim_beats(reference_beats)
+    >>> estimated_beats = mir_eval.io.load_events('estimated.txt')
+    >>> estimated_beats = mir_eval.beat.trim_beats(estimated_beats)
+    >>> thresholds = np.linspace(.005, .1, 100)
+    >>> f_measures = mir_eval.beat.f_measure_sweep(reference_beats,
+                                                   estimated_beats,
+                                                   thresholds)
+
+    Parameters
+    ----------
+    reference_beats : np.ndarray
+        reference beat times, in seconds
+    estimated_beats : np.ndarray
+        estimated beat times, in seconds
+    f_measure_thresholds : np.ndarray
+        Window sizes, in seconds
+
+    Returns
+    -------
+    f_scores : np.ndarray
+        The computed F-measure score for each window
+
+    """
+    validate(reference_beats, estimated_beats)
+    f_measure_thresholds = np.atleast_1d(
+        np.asarray(f_measure_thresholds, dtype=np.float64))
+    # When estimated beats are empty, no beats are correct; metric is 0
+    if estimated_beats.size == 0 or reference_beats.size == 0:
+        return np.zeros(f_measure_thresholds.shape)
+    # Compute the size of the best-case matching for every window at once
+    n_matches = util.match_events_sweep(reference_beats,
+                                        estimated_beats,
+                                        f_measure_thresholds)
+
+    precision = n_matches/float(len(estimated_beats))
+    recall = n_matches/float(len(reference_beats))
+    return np.array([util.f_measure(p, r) for p, r in zip(precision, recall)])
+
+
 def cemgil(reference_beats,
            estimated_beats,
            cemgil_sigma=0.04):
@@ -625,10 +680,12 @@ def information_gain(reference_beats,
     # metric, so return 0
     if estimated_beats.size <= 1 or reference_beats.size <= 1:
         return 0.
-    # Get entropy for reference beats->estimated beats
+    # Get beat error histograms for reference beats->estimated beats
     # and estimated beats->reference beats
-    forward_entropy = _get_entropy(reference_beats, estimated_beats, bins)
-    backward_entropy = _get_entropy(estimated_beats, reference_beats, bins)
+    forward_histogram, backward_histogram = _get_beat_error_histograms(
+        reference_beats, estimated_beats, bins)
+    forward_entropy = _get_entropy(forward_histogram)
+    backward_entropy = _get_entropy(backward_histogram)
     # Pick the larger of the entropies
     norm = np.log2(bins)
     if forward_entropy > backward_entropy:
@@ -639,9 +696,82 @@ def information_gain(reference_beats,
     return information_gain_score
 
 
-def _get_entropy(reference_beats, estimated_beats, bins):
-    """Helper function for information gain
-    (needs to be run twice - once backwards, once forwards)
+def beat_error_histograms(reference_beats,
+                          estimated_beats,
+                          bins=41):
+    """Get the forward and backward beat error histograms used by
+    :func:`information_gain`.
+
+    The raw bin counts are returned (rather than the information gain), so
+    that histograms can be accumulated over a corpus before computing any
+    statistics.
+
+    Examples
+    --------
+    >>> reference_beats = mir_eval.io.load_events('reference.txt')
+    >>> reference_beats = mir_eval.beat.trim_beats(reference_beats)
+    >>> estimated_beats = mir_eval.io.load_events('estimated.txt')
+    >>> estimated_beats = mir_eval.beat.trim_beats(estimated_beats)
+    >>> forward, backward = mir_eval.beat.beat_error_histograms(
+    ...     reference_beats, estimated_beats)
+
+    Parameters
+    ----------
+    reference_beats : np.ndarray
+        reference beat times, in seconds
+    estimated_beats : np.ndarray
+        query beat times, in seconds
+    bins : int
+        Number of bins in the beat error histogram
+        (Default value = 41)
+
+    Returns
+    -------
+    forward_histogram : np.ndarray, shape=(bins,)
+        Histogram of the errors of each estimated beat, relative to the
+        reference inter-beat intervals
+    backward_histogram : np.ndarray, shape=(bins,)
+        Histogram of the errors of each reference beat, relative to the
+        estimated inter-beat intervals
+    """
+    validate(reference_beats, estimated_beats)
+    # When estimated or reference beats have <= 1 beats, beat intervals
+    # can't be computed, so return empty histograms
+    if estimated_beats.size <= 1 or reference_beats.size <= 1:
+        return np.zeros(bins, dtype=int), np.zeros(bins, dtype=int)
+    return _get_beat_error_histograms(reference_beats, estimated_beats, bins)
+
+
+# Beat error histogram bin edges, indexed by number of bins
+_BIN_EDGES = {}
+
+
+def _get_bin_edges(bins):
+    """Get the (cached) bin edges of the beat error histogram.
+
+    Parameters
+    ----------
+    bins : int
+        Number of bins in the beat error histogram
+
+    Returns
+    -------
+    bin_edges : np.ndarray, shape=(bins + 1,)
+        Read-only array of uniformly spaced bin edges on [-.5, .5]
+
+    """
+    if bins not in _BIN_EDGES:
+        # Note these are slightly different the beat evaluation toolbox
+        # (they are uniform)
+        bin_edges = np.linspace(-.5, .5, bins + 1)
+        bin_edges.flags.writeable = False
+        _BIN_EDGES[bins] = bin_edges
+    return _BIN_EDGES[bins]
+
+
+def _get_beat_error_histograms(reference_beats, estimated_beats, bins):
+    """Helper function for information gain which computes the beat error
+    histograms in both directions
 
     Parameters
     ----------
@@ -652,49 +782,88 @@ def _get_entropy(reference_beats, estimated_beats, bins):
     bins : int
         Number of bins in the beat error histogram
 
+    Returns
+    -------
+    forward_histogram : np.ndarray, shape=(bins,)
+        Histogram of beat errors for reference beats->estimated beats
+    backward_histogram : np.ndarray, shape=(bins,)
+        Histogram of beat errors for estimated beats->reference beats
+
+    """
+    bin_edges = _get_bin_edges(bins)
+    forward_error = _get_beat_errors(reference_beats, estimated_beats)
+    backward_error = _get_beat_errors(estimated_beats, reference_beats)
+    return (np.histogram(forward_error, bin_edges)[0],
+            np.histogram(backward_error, bin_edges)[0])
+
+
+def _get_beat_errors(reference_beats, estimated_beats):
+    """Compute the error of each estimated beat, normalized by the
+    inter-annotation-interval of its closest reference beat.
+
+    Parameters
+    ----------
+    reference_beats : np.ndarray
+        reference beat times, in seconds
+    estimated_beats : np.ndarray
+        query beat times, in seconds
+
+    Returns
+    -------
+    beat_error : np.ndarray, shape=(len(estimated_beats),)
+        Normalized beat errors, in the range [-.5, .5)
+
+    """
+    # Reference beats are sorted, so the closest annotation to each beat is
+    # either the one just before or the one just after it
+    last = reference_beats.shape[0] - 1
+    after = np.minimum(np.searchsorted(reference_beats, estimated_beats), last)
+    before = np.maximum(after - 1, 0)
+    # In case of repeated annotations, pick the first, as np.argmin would
+    after = np.searchsorted(reference_beats, reference_beats[after])
+    before = np.searchsorted(reference_beats, reference_beats[before])
+    before_distance = np.abs(estimated_beats - reference_beats[before])
+    after_distance = np.abs(estimated_beats - reference_beats[after])
+    closest_beat = np.where(before_distance <= after_distance, before, after)
+    absolute_error = estimated_beats - reference_beats[closest_beat]
+    # Closest annotation is the one after the current beat
+    # so look at next inner-annotation-interval
+    next_beat = np.minimum(closest_beat + 1, last)
+    interval = .5*(reference_beats[next_beat] -
+                   reference_beats[closest_beat])
+    # Closest annotation is the one before the current beat
+    # so look at previous inner-annotation-interval.
+    # Note that for the first annotation this wraps around to the last
+    # annotation, as in the original per-beat implementation.
+    previous = absolute_error < 0
+    interval[previous] = .5*(reference_beats[closest_beat[previous]] -
+                             reference_beats[closest_beat[previous] - 1])
+    # If last annotation is closest, use the last inter-annotation-interval
+    interval[closest_beat == last] = .5*(reference_beats[-1] -
+                                         reference_beats[-2])
+    # The actual error of each beat
+    beat_error = .5*absolute_error/interval
+    # Put beat errors in range (-.5, .5)
+    return np.mod(beat_error + .5, -1) + .5
+
+
+def _get_entropy(histogram):
+    """Helper function for information gain
+    (needs to be run twice - once backwards, once forwards)
+
+    Parameters
+    ----------
+    histogram : np.ndarray
+        Beat error histogram bin counts
+
     Returns
     -------
     entropy : float
         Entropy of beat error histogram
 
     """
-    beat_error = np.zeros(estimated_beats.shape[0])
-    for n in range(estimated_beats.shape[0]):
-        # Get index of closest annotation to this beat
-        beat_distances = estimated_beats[n] - reference_beats
-        closest_beat = np.argmin(np.abs(beat_distances))
-        absolute_error = beat_distances[closest_beat]
-        # If the first annotation is closest...
-        if closest_beat == 0:
-            # Inter-annotation interval - space between first two beats
-            interval = .5*(reference_beats[1] - reference_beats[0])
-        # If last annotation is closest...
-        if closest_beat == (reference_beats.shape[0] - 1):
-            interval = .5*(reference_beats[-1] - reference_beats[-2])
-        else:
-            if absolute_error < 0:
-                # Closest annotation is the one before the current beat
-                # so look at previous inner-annotation-interval
-                start = reference_beats[closest_beat]
-                end = reference_beats[closest_beat - 1]
-                interval = .5*(start - end)
-            else:
-                # Closest annotation is the one after the current beat
-                # so look at next inner-annotation-interval
-                start = reference_beats[closest_beat + 1]
-                end = reference_beats[closest_beat]
-                interval = .5*(start - end)
-        # The actual error of this beat
-        beat_error[n] = .5*absolute_error/interval
-    # Put beat errors in range (-.5, .5)
-    beat_error = np.mod(beat_error + .5, -1) + .5
-    # Note these are slightly different the beat evaluation toolbox
-    # (they are uniform)
-    histogram_bin_edges = np.linspace(-.5, .5, bins + 1)
-    # Get the histogram
-    raw_bin_values = np.histogram(beat_error, histogram_bin_edges)[0]
     # Turn into a proper probability distribution
-    raw_bin_values = raw_bin_values/(1.0*np.sum(raw_bin_values))
+    raw_bin_values = histogram/(1.0*np.sum(histogram))
     # Set zero-valued bins to 1 to make the entropy calculation well-behaved
     raw_bin_values[raw_bin_values == 0] = 1
     # Calculate entropy
@@ -29,6 +29,11 @@ functions.  When converting the chord string into its constituent parts,
 * Chord bitmaps are positional binary vectors indicating active pitch classes
   and may be absolute or relative depending on context in the code.
 
+* Packed bitmaps store the same information in the low 12 bits of an
+  integer, so that bit ``i`` is set when ``bitmap[i]`` is active (see
+  :func:`mir_eval.chord.pack_bitmaps`).  The comparison functions operate
+  on packed bitmaps internally.
+
 If no chord is present at a given point in time, it should have the label 'N',
 which is defined in the variable ``mir_eval.chord.NO_CHORD``.
 
@@ -79,6 +84,9 @@ Metrics
 * :func:`mir_eval.chord.sevenths_inv`: Same as above, with inversions (bass
   relationships).
 
+For error analysis, :func:`mir_eval.chord.confusion_matrix` accumulates the
+duration-weighted confusions between reference and estimated chords at the
+granularity of roots, major/minor triads, or sevenths.
 
 References
 ----------
@@ -230,6 +238,25 @@ def scale_degree_to_bitmap(scale_degree, modulo=False, length=BITMAP_LENGTH):
     return np.array(edit_map)
 
 
+def _scale_degree_bitmaps():
+    r'''Map from scale degree tokens and modulo flags to bitmaps, for every
+    degree with up to two accidentals.'''
+    bitmaps = dict()
+    for degree in SCALE_DEGREES:
+        for accidental in ['', 'b', 'bb', '#', '##']:
+            for omission in ['', '*']:
+                scale_degree = omission + accidental + degree
+                for modulo in [False, True]:
+                    bitmap = scale_degree_to_bitmap(scale_degree, modulo)
+                    bitmap.flags.writeable = False
+                    bitmaps[scale_degree, modulo] = bitmap
+    return bitmaps
+
+
+# Maps (scale degree, modulo) to read-only bitmaps from scale_degree_to_bitmap
+SCALE_DEGREE_BITMAPS = _scale_degree_bitmaps()
+
+
 # Maps quality strings to bitmaps, corresponding to relative pitch class
 # semitones, i.e. vector[0] is the tonic.
 QUALITIES = {
@@ -327,6 +354,58 @@ def reduce_extended_quality(quality):
 
 
 # --- Chord Label Parsing ---
+# A single (possibly altered) scale degree, e.g. '3', 'b7' or '#11'
+_SCALE_DEGREE_PATTERN = r'(?:b*|\#*)(?:1[0-3]|[1-9])'
+
+# Quality shorthands accepted by the chord label grammar
+_QUALITY_PATTERN = '|'.join(sorted(
+    ['maj', 'min', 'dim', 'aug', '1', '5', 'sus2', 'sus4', 'maj6', 'min6',
+     '7', 'maj7', 'min7', 'dim7', 'hdim7', 'minmaj7', 'aug7', '9', 'maj9',
+     'min9', '11', 'maj11', 'min11', '13', 'maj13', 'min13'],
+    key=len, reverse=True))
+
+# This grammar is pulled from the JAMS chord namespace, which is in turn
+# derived from the context-free grammar of Harte et al., 2005.  A colon must
+# be followed by a quality, a list of scale degrees, or both.
+_CHORD_LABEL_PATTERN = re.compile(
+    r'''^(?:(?P<no_chord>N|X)|
+        (?P<root>[A-G](?:b*|\#*))
+        (?::(?!/|$)
+            (?P<quality>{quality})?
+            (?:\((?P<scale_degrees>\*?{degree}(?:,\*?{degree})*)\))?
+        )?
+        (?:/(?P<bass>{degree}))?
+    )$'''.format(quality=_QUALITY_PATTERN, degree=_SCALE_DEGREE_PATTERN),
+    re.VERBOSE)
+
+
+def _match_chord_label(chord_label):
+    """Match a chord label against the chord label grammar.
+
+    Parameters
+    ----------
+    chord_label : str
+        Chord label to match.
+
+    Returns
+    -------
+    match : re.MatchObject
+        Match with the groups ``no_chord``, ``root``, ``quality``,
+        ``scale_degrees`` and ``bass``.
+
+    Raises
+    ------
+    InvalidChordException
+        If the chord label is not well-formed.
+
+    """
+    match = _CHORD_LABEL_PATTERN.match(chord_label)
+    if match is None:
+        raise InvalidChordException('Invalid chord label: '
+                                    '{}'.format(chord_label))
+    return match
+
+
 def validate_chord_label(chord_label):
     """Test for well-formedness of a chord label.
 
@@ -336,17 +415,7 @@ def validate_chord_label(chord_label):
         Chord label to validate.
 
     """
-
-    # This monster regexp is pulled from the JAMS chord namespace,
-    # which is in turn derived from the context-free grammar of
-    # Harte et al., 2005.
-
-    pattern = re.compile(r'''^((N|X)|(([A-G](b*|#*))((:(maj|min|dim|aug|1|5|sus2|sus4|maj6|min6|7|maj7|min7|dim7|hdim7|minmaj7|aug7|9|maj9|min9|11|maj11|min11|13|maj13|min13)(\((\*?((b*|#*)([1-9]|1[0-3]?))(,\*?((b*|#*)([1-9]|1[0-3]?)))*)\))?)|(:\((\*?((b*|#*)([1-9]|1[0-3]?))(,\*?((b*|#*)([1-9]|1[0-3]?)))*)\)))?((/((b*|#*)([1-9]|1[0-3]?)))?)?))$''')  # nopep8
-
-    if not pattern.match(chord_label):
-        raise InvalidChordException('Invalid chord label: '
-                                    '{}'.format(chord_label))
-    pass
+    _match_chord_label(chord_label)
 
 
 def split(chord_label, reduce_extended_chords=False):
@@ -382,39 +451,26 @@ def split(chord_label, reduce_extended_chords=False):
 
     """
     chord_label = str(chord_label)
-    validate_chord_label(chord_label)
+    match = _match_chord_label(chord_label)
     if chord_label == NO_CHORD:
         return [chord_label, '', set(), '']
+    if match.group('no_chord'):
+        # 'X' is split like a bare root
+        return [chord_label, 'maj', set(), '1']
 
-    bass = '1'
-    if "/" in chord_label:
-        chord_label, bass = chord_label.split("/")
+    bass = match.group('bass') or '1'
 
     scale_degrees = set()
-    omission = False
-    if "(" in chord_label:
-        chord_label, scale_degrees = chord_label.split("(")
-        omission = "*" in scale_degrees
-        scale_degrees = scale_degrees.strip(")")
-        scale_degrees = set([i.strip() for i in scale_degrees.split(",")])
+    if match.group('scale_degrees'):
+        scale_degrees = set(match.group('scale_degrees').split(','))
 
     # Note: Chords lacking quality AND added interval information are major.
     #   If a quality shorthand is specified, it is returned.
     #   If an interval is specified WITHOUT a quality, the quality field is
     #     empty.
-    #   Intervals specifying omissions MUST have a quality.
-    if omission and ":" not in chord_label:
-        raise InvalidChordException(
-            "Intervals specifying omissions MUST have a quality.")
-    quality = '' if scale_degrees else 'maj'
-    if ":" in chord_label:
-        chord_root, quality_name = chord_label.split(":")
-        # Extended chords (with ":"s) may not explicitly have Major qualities,
-        # so only overwrite the default if the string is not empty.
-        if quality_name:
-            quality = quality_name.lower()
-    else:
-        chord_root = chord_label
+    #   The grammar only admits intervals (and so omissions) after a colon.
+    quality = match.group('quality') or ('' if scale_degrees else 'maj')
+    chord_root = match.group('root')
 
     if reduce_extended_chords:
         quality, addl_scale_degrees = reduce_extended_quality(quality)
@@ -499,10 +555,14 @@ def encode(chord_label, reduce_extended_chords=False,
     semitone_bitmap[0] = 1
 
     for scale_degree in scale_degrees:
-        semitone_bitmap += scale_degree_to_bitmap(scale_degree,
-                                                  reduce_extended_chords)
-
-    semitone_bitmap = (semitone_bitmap > 0).astype(np.int)
+        degree_bitmap = SCALE_DEGREE_BITMAPS.get(
+            (scale_degree, reduce_extended_chords), None)
+        if degree_bitmap is None:
+            degree_bitmap = scale_degree_to_bitmap(scale_degree,
+                                                   reduce_extended_chords)
+        semitone_bitmap += degree_bitmap
+
+    semitone_bitmap = (semitone_bitmap > 0).astype(int)
     if not semitone_bitmap[bass_number] and strict_bass_intervals:
         raise InvalidChordException(
             "Given bass scale degree is absent from this chord: "
@@ -512,10 +572,46 @@ def encode(chord_label, reduce_extended_chords=False,
     return root_number, semitone_bitmap, bass_number
 
 
-def encode_many(chord_labels, reduce_extended_chords=False):
+# Process-wide cache of encoded chord labels, in least-recently-used order.
+# Keys are ``(chord_label, reduce_extended_chords, strict_bass_intervals)``.
+_ENCODE_CACHE = collections.OrderedDict()
+
+# Maximum number of encoded chord labels to keep in ``_ENCODE_CACHE``
+ENCODE_CACHE_SIZE = 4096
+
+
+def _encode_cached(chord_label, reduce_extended_chords=False,
+                   strict_bass_intervals=False):
+    """Encode a chord label, reusing previous results where possible.
+
+    See :func:`encode` for a description of the parameters.  The returned
+    bitmap is shared between calls, and must not be modified.
+    """
+    key = (chord_label, reduce_extended_chords, strict_bass_intervals)
+    result = _ENCODE_CACHE.pop(key, None)
+    if result is None:
+        root_number, semitone_bitmap, bass_number = encode(
+            chord_label, reduce_extended_chords=reduce_extended_chords,
+            strict_bass_intervals=strict_bass_intervals)
+        semitone_bitmap = np.array(semitone_bitmap, dtype=np.int8)
+        semitone_bitmap.flags.writeable = False
+        result = root_number, semitone_bitmap, bass_number
+        # Evict the least recently used labels
+        while _ENCODE_CACHE and len(_ENCODE_CACHE) >= ENCODE_CACHE_SIZE:
+            _ENCODE_CACHE.popitem(last=False)
+    # (Re-)insert the label as the most recently used
+    _ENCODE_CACHE[key] = result
+    return result
+
+
+def encode_many(chord_labels, reduce_extended_chords=False,
+                strict_bass_intervals=False):
     """Translate a set of chord labels to numerical representations for sane
     evaluation.
 
+    Each distinct label is encoded only once, and encodings are cached
+    across calls (see ``ENCODE_CACHE_SIZE``).
+
     Parameters
     ----------
     chord_labels : list
@@ -524,6 +620,9 @@ def encode_many(chord_labels, reduce_extended_chords=False):
         Whether to map the upper voicings of extended chords (9's, 11's, 13's)
         to semitone extensions.
         (Default value = False)
+    strict_bass_intervals : bool
+        Whether to require that the bass scale degree is present in the chord.
+        (Default value = False)
 
     Returns
     -------
@@ -535,17 +634,28 @@ def encode_many(chord_labels, reduce_extended_chords=False):
         Relative semitones of the chord's bass notes.
 
     """
-    num_items = len(chord_labels)
-    roots, basses = np.zeros([2, num_items], dtype=np.int)
-    semitones = np.zeros([num_items, 12], dtype=np.int)
-    local_cache = dict()
-    for i, label in enumerate(chord_labels):
-        result = local_cache.get(label, None)
-        if result is None:
-            result = encode(label, reduce_extended_chords)
-            local_cache[label] = result
-        roots[i], semitones[i], basses[i] = result
-    return roots, semitones, basses
+    if len(chord_labels) == 0:
+        return (np.zeros(0, dtype=int),
+                np.zeros([0, BITMAP_LENGTH], dtype=int),
+                np.zeros(0, dtype=int))
+
+    # Encode each distinct label once, then gather
+    label_index, index_to_label = util.index_labels(chord_labels,
+                                                    case_sensitive=True)
+    label_index = np.asarray(label_index)
+
+    num_unique = len(index_to_label)
+    unique_roots, unique_basses = np.zeros([2, num_unique], dtype=int)
+    unique_semitones = np.zeros([num_unique, BITMAP_LENGTH], dtype=int)
+    for i in range(num_unique):
+        (unique_roots[i],
+         unique_semitones[i],
+         unique_basses[i]) = _encode_cached(str(index_to_label[i]),
+                                            reduce_extended_chords,
+                                            strict_bass_intervals)
+
+    return (unique_roots[label_index], unique_semitones[label_index],
+            unique_basses[label_index])
 
 
 def rotate_bitmap_to_root(bitmap, chord_root):
@@ -601,10 +711,83 @@ def rotate_bitmaps_to_roots(bitmaps, roots):
         Absolute bitmaps of active pitch classes.
 
     """
-    abs_bitmaps = []
-    for bitmap, chord_root in zip(bitmaps, roots):
-        abs_bitmaps.append(rotate_bitmap_to_root(bitmap, chord_root))
-    return np.asarray(abs_bitmaps)
+    bitmaps = np.asarray(bitmaps).reshape(-1, BITMAP_LENGTH)
+    roots = np.asarray(roots, dtype=int)
+
+    # abs_bitmaps[i, j] = bitmaps[i, (j - roots[i]) % 12];
+    # no-chord roots (-1) wrap around like any other root
+    idxs = (np.arange(BITMAP_LENGTH) - roots[:, np.newaxis]) % BITMAP_LENGTH
+    rows = np.arange(len(bitmaps))[:, np.newaxis]
+    return (bitmaps[rows, idxs] != 0).astype(bitmaps.dtype)
+
+
+# Packed bitmap of 'X' chords.  Any value above 12 bits is distinct from
+# every valid chord bitmap.
+X_CHORD_PACKED = 0xFFFF
+
+
+def pack_bitmaps(bitmaps):
+    """Pack relative or absolute chord bitmaps into 12-bit integers, where
+    bit ``i`` is set if pitch class (or semitone) ``i`` is active.
+
+    Bitmaps with negative entries ('X' chords) are packed as
+    ``X_CHORD_PACKED``.
+
+    Parameters
+    ----------
+    bitmaps : np.ndarray, shape=(N, 12)
+        Chord bitmaps, as returned by :func:`encode_many`.
+
+    Returns
+    -------
+    packed : np.ndarray, shape=(N,), dtype=np.uint16
+        Packed bitmaps.
+
+    """
+    bitmaps = np.asarray(bitmaps)
+    weights = np.left_shift(1, np.arange(BITMAP_LENGTH))
+    packed = np.dot(bitmaps > 0, weights).astype(np.uint16)
+    packed[np.any(bitmaps < 0, axis=-1)] = X_CHORD_PACKED
+    return packed
+
+
+# Number of set bits in each packed bitmap
+_POPCOUNT = np.array([bin(i).count('1')
+                      for i in range(1 << BITMAP_LENGTH)], dtype=np.uint8)
+
+# _ROTATIONS[root, bitmap] is the packed bitmap rotated up by `root`
+# semitones, i.e. :func:`rotate_bitmap_to_root` on packed bitmaps.
+_ROTATIONS = np.array(
+    [(np.left_shift(np.arange(1 << BITMAP_LENGTH), r) |
+      np.right_shift(np.arange(1 << BITMAP_LENGTH), BITMAP_LENGTH - r)) &
+     ((1 << BITMAP_LENGTH) - 1) for r in range(BITMAP_LENGTH)],
+    dtype=np.uint16)
+
+
+def _encode_packed(chord_labels):
+    """Encode chord labels as in :func:`encode_many`, but with packed
+    bitmaps as returned by :func:`pack_bitmaps`."""
+    roots, bitmaps, basses = encode_many(chord_labels, False)
+    return roots, pack_bitmaps(bitmaps), basses
+
+
+def _packed_quality(quality, n_semitones=BITMAP_LENGTH):
+    """Packed bitmap of the first `n_semitones` of a quality."""
+    packed = int(pack_bitmaps([QUALITIES[quality]])[0])
+    return packed & ((1 << n_semitones) - 1)
+
+
+def _has_bass(bitmaps, basses):
+    """Test whether each packed bitmap contains its bass semitone.
+
+    Chords without a bass (negative) are counted as containing it."""
+    bass_bits = np.right_shift(bitmaps, np.maximum(basses, 0)) & 1
+    return (basses < 0) | (bass_bits > 0)
+
+
+# Masks for the first 8 semitones (up to #5) and the third of a bitmap
+_TRIAD_MASK = (1 << 8) - 1
+_THIRD_MASK = 1 << 3
 
 
 # --- Comparison Routines ---
@@ -701,6 +884,101 @@ def weighted_accuracy(comparisons, weights):
     return np.sum(comparisons*normalized_weights)
 
 
+def unique_label_pairs(reference_labels, estimated_labels, weights):
+    """Collapse aligned reference and estimated labels to their distinct
+    ``(reference, estimate)`` pairs, summing the weights of each pair.
+
+    Every comparison function scores a pair of labels independently of the
+    others, so comparing the distinct pairs gives the same weighted accuracy
+    as comparing every segment, with work proportional to the number of
+    distinct pairs rather than the number of segments.
+
+    Examples
+    --------
+    >>> (ref_intervals,
+    ...  ref_labels) = mir_eval.io.load_labeled_intervals('ref.lab')
+    >>> (est_intervals,
+    ...  est_labels) = mir_eval.io.load_labeled_intervals('est.lab')
+    >>> est_intervals, est_labels = mir_eval.util.adjust_intervals(
+    ...     est_intervals, est_labels, ref_intervals.min(),
+    ...     ref_intervals.max(), mir_eval.chord.NO_CHORD,
+    ...     mir_eval.chord.NO_CHORD)
+    >>> (intervals,
+    ...  ref_labels,
+    ...  est_labels) = mir_eval.util.merge_labeled_intervals(
+    ...      ref_intervals, ref_labels, est_intervals, est_labels)
+    >>> durations = mir_eval.util.intervals_to_durations(intervals)
+    >>> (ref_pairs,
+    ...  est_pairs,
+    ...  weights) = mir_eval.chord.unique_label_pairs(ref_labels, est_labels,
+    ...                                              durations)
+    >>> comparisons = mir_eval.chord.thirds(ref_pairs, est_pairs)
+    >>> score = mir_eval.chord.weighted_accuracy(comparisons, weights)
+
+    Parameters
+    ----------
+    reference_labels : list, len=n
+        Reference chord labels.
+    estimated_labels : list, len=n
+        Estimated chord labels.
+    weights : np.ndarray, shape=(n,)
+        Weight of each pair of labels, e.g. interval durations.
+
+    Returns
+    -------
+    reference_labels : list, len=m
+        Reference label of each distinct pair.
+    estimated_labels : list, len=m
+        Estimated label of each distinct pair.
+    weights : np.ndarray, shape=(m,)
+        Total weight of each distinct pair.
+
+    Raises
+    ------
+    ValueError
+        If the labels and weights have different lengths.
+
+    """
+    weights = np.asarray(weights)
+    if not len(reference_labels) == len(estimated_labels) == len(weights):
+        raise ValueError('reference_labels, estimated_labels and weights '
+                         'should be of the same length.  Got {}, {} and '
+                         '{}'.format(len(reference_labels),
+                                     len(estimated_labels), len(weights)))
+
+    ref_index, ref_vocab = util.index_labels(reference_labels,
+                                             case_sensitive=True)
+    est_index, est_vocab = util.index_labels(estimated_labels,
+                                             case_sensitive=True)
+
+    # Give each (reference, estimate) pair a unique integer code
+    n_est = len(est_vocab)
+    pair_codes = (np.asarray(ref_index, dtype=np.int64) * n_est +
+                  np.asarray(est_index, dtype=np.int64))
+    pairs, pair_index = np.unique(pair_codes, return_inverse=True)
+
+    pair_weights = np.bincount(pair_index, weights=weights,
+                               minlength=len(pairs))
+
+    return ([ref_vocab[i] for i in pairs // max(n_est, 1)],
+            [est_vocab[i] for i in pairs % max(n_est, 1)],
+            pair_weights)
+
+
+def _thirds(ref_encoded, est_encoded):
+    """Compute :func:`thirds` from packed chord encodings."""
+    ref_roots, ref_bitmaps = ref_encoded[:2]
+    est_roots, est_bitmaps = est_encoded[:2]
+
+    eq_roots = ref_roots == est_roots
+    eq_thirds = ((ref_bitmaps ^ est_bitmaps) & _THIRD_MASK) == 0
+    comparison_scores = (eq_roots & eq_thirds).astype(float)
+
+    # Ignore 'X' chords
+    comparison_scores[ref_bitmaps == X_CHORD_PACKED] = -1.0
+    return comparison_scores
+
+
 def thirds(reference_labels, estimated_labels):
     """Compare chords along root & third relationships.
 
@@ -736,15 +1014,22 @@ def thirds(reference_labels, estimated_labels):
 
     """
     validate(reference_labels, estimated_labels)
-    ref_roots, ref_semitones = encode_many(reference_labels, False)[:2]
-    est_roots, est_semitones = encode_many(estimated_labels, False)[:2]
+    return _thirds(_encode_packed(reference_labels),
+                   _encode_packed(estimated_labels))
 
-    eq_roots = ref_roots == est_roots
-    eq_thirds = ref_semitones[:, 3] == est_semitones[:, 3]
-    comparison_scores = (eq_roots * eq_thirds).astype(np.float)
+
+def _thirds_inv(ref_encoded, est_encoded):
+    """Compute :func:`thirds_inv` from packed chord encodings."""
+    ref_roots, ref_bitmaps, ref_bass = ref_encoded
+    est_roots, est_bitmaps, est_bass = est_encoded
+
+    eq_root = ref_roots == est_roots
+    eq_bass = ref_bass == est_bass
+    eq_third = ((ref_bitmaps ^ est_bitmaps) & _THIRD_MASK) == 0
+    comparison_scores = (eq_root & eq_third & eq_bass).astype(float)
 
     # Ignore 'X' chords
-    comparison_scores[np.any(ref_semitones < 0, axis=1)] = -1.0
+    comparison_scores[ref_bitmaps == X_CHORD_PACKED] = -1.0
     return comparison_scores
 
 
@@ -783,16 +1068,21 @@ def thirds_inv(reference_labels, estimated_labels):
 
     """
     validate(reference_labels, estimated_labels)
-    ref_roots, ref_semitones, ref_bass = encode_many(reference_labels, False)
-    est_roots, est_semitones, est_bass = encode_many(estimated_labels, False)
+    return _thirds_inv(_encode_packed(reference_labels),
+                       _encode_packed(estimated_labels))
 
-    eq_root = ref_roots == est_roots
-    eq_bass = ref_bass == est_bass
-    eq_third = ref_semitones[:, 3] == est_semitones[:, 3]
-    comparison_scores = (eq_root * eq_third * eq_bass).astype(np.float)
+
+def _triads(ref_encoded, est_encoded):
+    """Compute :func:`triads` from packed chord encodings."""
+    ref_roots, ref_bitmaps = ref_encoded[:2]
+    est_roots, est_bitmaps = est_encoded[:2]
+
+    eq_roots = ref_roots == est_roots
+    eq_semitones = ((ref_bitmaps ^ est_bitmaps) & _TRIAD_MASK) == 0
+    comparison_scores = (eq_roots & eq_semitones).astype(float)
 
     # Ignore 'X' chords
-    comparison_scores[np.any(ref_semitones < 0, axis=1)] = -1.0
+    comparison_scores[ref_bitmaps == X_CHORD_PACKED] = -1.0
     return comparison_scores
 
 
@@ -831,16 +1121,22 @@ def triads(reference_labels, estimated_labels):
 
     """
     validate(reference_labels, estimated_labels)
-    ref_roots, ref_semitones = encode_many(reference_labels, False)[:2]
-    est_roots, est_semitones = encode_many(estimated_labels, False)[:2]
+    return _triads(_encode_packed(reference_labels),
+                   _encode_packed(estimated_labels))
+
+
+def _triads_inv(ref_encoded, est_encoded):
+    """Compute :func:`triads_inv` from packed chord encodings."""
+    ref_roots, ref_bitmaps, ref_bass = ref_encoded
+    est_roots, est_bitmaps, est_bass = est_encoded
 
     eq_roots = ref_roots == est_roots
-    eq_semitones = np.all(
-        np.equal(ref_semitones[:, :8], est_semitones[:, :8]), axis=1)
-    comparison_scores = (eq_roots * eq_semitones).astype(np.float)
+    eq_basses = ref_bass == est_bass
+    eq_semitones = ((ref_bitmaps ^ est_bitmaps) & _TRIAD_MASK) == 0
+    comparison_scores = (eq_roots & eq_semitones & eq_basses).astype(float)
 
     # Ignore 'X' chords
-    comparison_scores[np.any(ref_semitones < 0, axis=1)] = -1.0
+    comparison_scores[ref_bitmaps == X_CHORD_PACKED] = -1.0
     return comparison_scores
 
 
@@ -879,17 +1175,21 @@ def triads_inv(reference_labels, estimated_labels):
 
     """
     validate(reference_labels, estimated_labels)
-    ref_roots, ref_semitones, ref_bass = encode_many(reference_labels, False)
-    est_roots, est_semitones, est_bass = encode_many(estimated_labels, False)
+    return _triads_inv(_encode_packed(reference_labels),
+                       _encode_packed(estimated_labels))
+
+
+def _tetrads(ref_encoded, est_encoded):
+    """Compute :func:`tetrads` from packed chord encodings."""
+    ref_roots, ref_bitmaps = ref_encoded[:2]
+    est_roots, est_bitmaps = est_encoded[:2]
 
     eq_roots = ref_roots == est_roots
-    eq_basses = ref_bass == est_bass
-    eq_semitones = np.all(
-        np.equal(ref_semitones[:, :8], est_semitones[:, :8]), axis=1)
-    comparison_scores = (eq_roots * eq_semitones * eq_basses).astype(np.float)
+    eq_semitones = ref_bitmaps == est_bitmaps
+    comparison_scores = (eq_roots & eq_semitones).astype(float)
 
     # Ignore 'X' chords
-    comparison_scores[np.any(ref_semitones < 0, axis=1)] = -1.0
+    comparison_scores[ref_bitmaps == X_CHORD_PACKED] = -1.0
     return comparison_scores
 
 
@@ -928,15 +1228,22 @@ def tetrads(reference_labels, estimated_labels):
 
     """
     validate(reference_labels, estimated_labels)
-    ref_roots, ref_semitones = encode_many(reference_labels, False)[:2]
-    est_roots, est_semitones = encode_many(estimated_labels, False)[:2]
+    return _tetrads(_encode_packed(reference_labels),
+                    _encode_packed(estimated_labels))
+
+
+def _tetrads_inv(ref_encoded, est_encoded):
+    """Compute :func:`tetrads_inv` from packed chord encodings."""
+    ref_roots, ref_bitmaps, ref_bass = ref_encoded
+    est_roots, est_bitmaps, est_bass = est_encoded
 
     eq_roots = ref_roots == est_roots
-    eq_semitones = np.all(np.equal(ref_semitones, est_semitones), axis=1)
-    comparison_scores = (eq_roots * eq_semitones).astype(np.float)
+    eq_basses = ref_bass == est_bass
+    eq_semitones = ref_bitmaps == est_bitmaps
+    comparison_scores = (eq_roots & eq_semitones & eq_basses).astype(float)
 
     # Ignore 'X' chords
-    comparison_scores[np.any(ref_semitones < 0, axis=1)] = -1.0
+    comparison_scores[ref_bitmaps == X_CHORD_PACKED] = -1.0
     return comparison_scores
 
 
@@ -975,16 +1282,18 @@ def tetrads_inv(reference_labels, estimated_labels):
 
     """
     validate(reference_labels, estimated_labels)
-    ref_roots, ref_semitones, ref_bass = encode_many(reference_labels, False)
-    est_roots, est_semitones, est_bass = encode_many(estimated_labels, False)
+    return _tetrads_inv(_encode_packed(reference_labels),
+                        _encode_packed(estimated_labels))
 
-    eq_roots = ref_roots == est_roots
-    eq_basses = ref_bass == est_bass
-    eq_semitones = np.all(np.equal(ref_semitones, est_semitones), axis=1)
-    comparison_scores = (eq_roots * eq_semitones * eq_basses).astype(np.float)
+
+def _root(ref_encoded, est_encoded):
+    """Compute :func:`root` from packed chord encodings."""
+    ref_roots, ref_bitmaps = ref_encoded[:2]
+    est_roots = est_encoded[0]
+    comparison_scores = (ref_roots == est_roots).astype(float)
 
     # Ignore 'X' chords
-    comparison_scores[np.any(ref_semitones < 0, axis=1)] = -1.0
+    comparison_scores[ref_bitmaps == X_CHORD_PACKED] = -1.0
     return comparison_scores
 
 
@@ -1023,14 +1332,42 @@ def root(reference_labels, estimated_labels):
         gamut.
 
     """
-
     validate(reference_labels, estimated_labels)
-    ref_roots, ref_semitones = encode_many(reference_labels, False)[:2]
-    est_roots = encode_many(estimated_labels, False)[0]
-    comparison_scores = (ref_roots == est_roots).astype(np.float)
+    return _root(_encode_packed(reference_labels),
+                 _encode_packed(estimated_labels))
 
-    # Ignore 'X' chords
-    comparison_scores[np.any(ref_semitones < 0, axis=1)] = -1.0
+
+def _mirex(ref_encoded, est_encoded):
+    """Compute :func:`mirex` from packed chord encodings."""
+    # TODO(?): Should this be an argument?
+    min_intersection = 3
+    ref_roots, ref_bitmaps = ref_encoded[:2]
+    est_roots, est_bitmaps = est_encoded[:2]
+
+    # Rotate to absolute pitch classes.  'X' chords rotate to all pitch
+    # classes, and no-chord roots (-1) wrap around as in
+    # rotate_bitmaps_to_roots.
+    bit_mask = (1 << BITMAP_LENGTH) - 1
+    ref_chroma = _ROTATIONS[ref_roots % BITMAP_LENGTH, ref_bitmaps & bit_mask]
+    est_chroma = _ROTATIONS[est_roots % BITMAP_LENGTH, est_bitmaps & bit_mask]
+
+    eq_chroma = _POPCOUNT[ref_chroma & est_chroma]
+
+    # Chroma matching for set bits
+    comparison_scores = (eq_chroma >= min_intersection).astype(float)
+
+    # No-chord matching; match -1 roots, SKIP_CHORDS dropped next
+    no_root = np.logical_and(ref_roots == -1, est_roots == -1)
+    comparison_scores[no_root] = 1.0
+
+    # Skip chords where the number of active semitones `n` is
+    #   0 < n < `min_intersection`.
+    ref_semitone_count = _POPCOUNT[ref_bitmaps & bit_mask]
+    skip_idx = np.logical_and(ref_semitone_count > 0,
+                              ref_semitone_count < min_intersection)
+    # Also ignore 'X' chords.
+    np.logical_or(skip_idx, ref_bitmaps == X_CHORD_PACKED, skip_idx)
+    comparison_scores[skip_idx] = -1.0
     return comparison_scores
 
 
@@ -1069,30 +1406,38 @@ def mirex(reference_labels, estimated_labels):
 
     """
     validate(reference_labels, estimated_labels)
-    # TODO(?): Should this be an argument?
-    min_intersection = 3
-    ref_data = encode_many(reference_labels, False)
-    ref_chroma = rotate_bitmaps_to_roots(ref_data[1], ref_data[0])
-    est_data = encode_many(estimated_labels, False)
-    est_chroma = rotate_bitmaps_to_roots(est_data[1], est_data[0])
+    return _mirex(_encode_packed(reference_labels),
+                  _encode_packed(estimated_labels))
 
-    eq_chroma = (ref_chroma * est_chroma).sum(axis=-1)
 
-    # Chroma matching for set bits
-    comparison_scores = (eq_chroma >= min_intersection).astype(np.float)
+def _majmin(ref_encoded, est_encoded):
+    """Compute :func:`majmin` from packed chord encodings."""
+    maj_semitones = _packed_quality('maj', 8)
+    min_semitones = _packed_quality('min', 8)
 
-    # No-chord matching; match -1 roots, SKIP_CHORDS dropped next
-    no_root = np.logical_and(ref_data[0] == -1, est_data[0] == -1)
-    comparison_scores[no_root] = 1.0
+    ref_roots, ref_bitmaps, _ = ref_encoded
+    est_roots, est_bitmaps, _ = est_encoded
 
-    # Skip chords where the number of active semitones `n` is
-    #   0 < n < `min_intersection`.
-    ref_semitone_count = (ref_data[1] > 0).sum(axis=1)
-    skip_idx = np.logical_and(ref_semitone_count > 0,
-                              ref_semitone_count < min_intersection)
-    # Also ignore 'X' chords.
-    np.logical_or(skip_idx, np.any(ref_data[1] < 0, axis=1), skip_idx)
-    comparison_scores[skip_idx] = -1.0
+    eq_root = ref_roots == est_roots
+    eq_quality = ((ref_bitmaps ^ est_bitmaps) & _TRIAD_MASK) == 0
+    comparison_scores = (eq_root & eq_quality).astype(float)
+
+    # Test for Major / Minor / No-chord
+    ref_triads = ref_bitmaps & _TRIAD_MASK
+    is_maj = ref_triads == maj_semitones
+    is_min = ref_triads == min_semitones
+    is_none = np.logical_and(ref_roots < 0, ref_bitmaps == 0)
+
+    # Only keep majors, minors, and Nones (NOR)
+    comparison_scores[(is_maj | is_min | is_none) == 0] = -1
+
+    # Disable chords that disrupt this quality (apparently)
+    # ref_voicing = np.all(np.equal(ref_qualities[:, :8],
+    #                               ref_notes[:, :8]), axis=1)
+    # comparison_scores[ref_voicing == 0] = -1
+    # est_voicing = np.all(np.equal(est_qualities[:, :8],
+    #                               est_notes[:, :8]), axis=1)
+    # comparison_scores[est_voicing == 0] = -1
     return comparison_scores
 
 
@@ -1133,32 +1478,33 @@ def majmin(reference_labels, estimated_labels):
 
     """
     validate(reference_labels, estimated_labels)
-    maj_semitones = np.array(QUALITIES['maj'][:8])
-    min_semitones = np.array(QUALITIES['min'][:8])
+    return _majmin(_encode_packed(reference_labels),
+                   _encode_packed(estimated_labels))
 
-    ref_roots, ref_semitones, _ = encode_many(reference_labels, False)
-    est_roots, est_semitones, _ = encode_many(estimated_labels, False)
 
-    eq_root = ref_roots == est_roots
-    eq_quality = np.all(np.equal(ref_semitones[:, :8],
-                                 est_semitones[:, :8]), axis=1)
-    comparison_scores = (eq_root * eq_quality).astype(np.float)
+def _majmin_inv(ref_encoded, est_encoded):
+    """Compute :func:`majmin_inv` from packed chord encodings."""
+    maj_semitones = _packed_quality('maj', 8)
+    min_semitones = _packed_quality('min', 8)
+
+    ref_roots, ref_bitmaps, ref_bass = ref_encoded
+    est_roots, est_bitmaps, est_bass = est_encoded
+
+    eq_root_bass = (ref_roots == est_roots) & (ref_bass == est_bass)
+    eq_semitones = ((ref_bitmaps ^ est_bitmaps) & _TRIAD_MASK) == 0
+    comparison_scores = (eq_root_bass & eq_semitones).astype(float)
 
     # Test for Major / Minor / No-chord
-    is_maj = np.all(np.equal(ref_semitones[:, :8], maj_semitones), axis=1)
-    is_min = np.all(np.equal(ref_semitones[:, :8], min_semitones), axis=1)
-    is_none = np.logical_and(ref_roots < 0, np.all(ref_semitones == 0, axis=1))
+    ref_triads = ref_bitmaps & _TRIAD_MASK
+    is_maj = ref_triads == maj_semitones
+    is_min = ref_triads == min_semitones
+    is_none = np.logical_and(ref_roots < 0, ref_bitmaps == 0)
 
     # Only keep majors, minors, and Nones (NOR)
-    comparison_scores[(is_maj + is_min + is_none) == 0] = -1
+    comparison_scores[(is_maj | is_min | is_none) == 0] = -1
 
-    # Disable chords that disrupt this quality (apparently)
-    # ref_voicing = np.all(np.equal(ref_qualities[:, :8],
-    #                               ref_notes[:, :8]), axis=1)
-    # comparison_scores[ref_voicing == 0] = -1
-    # est_voicing = np.all(np.equal(est_qualities[:, :8],
-    #                               est_notes[:, :8]), axis=1)
-    # comparison_scores[est_voicing == 0] = -1
+    # Disable inversions that are not part of the quality
+    comparison_scores[~_has_bass(ref_bitmaps, ref_bass)] = -1
     return comparison_scores
 
 
@@ -1200,30 +1546,26 @@ def majmin_inv(reference_labels, estimated_labels):
 
     """
     validate(reference_labels, estimated_labels)
-    maj_semitones = np.array(QUALITIES['maj'][:8])
-    min_semitones = np.array(QUALITIES['min'][:8])
+    return _majmin_inv(_encode_packed(reference_labels),
+                       _encode_packed(estimated_labels))
 
-    ref_roots, ref_semitones, ref_bass = encode_many(reference_labels, False)
-    est_roots, est_semitones, est_bass = encode_many(estimated_labels, False)
 
-    eq_root_bass = (ref_roots == est_roots) * (ref_bass == est_bass)
-    eq_semitones = np.all(np.equal(ref_semitones[:, :8],
-                                   est_semitones[:, :8]), axis=1)
-    comparison_scores = (eq_root_bass * eq_semitones).astype(np.float)
+def _sevenths(ref_encoded, est_encoded):
+    """Compute :func:`sevenths` from packed chord encodings."""
+    seventh_qualities = ['maj', 'min', 'maj7', '7', 'min7', '']
+    valid_semitones = [_packed_quality(name) for name in seventh_qualities]
 
-    # Test for Major / Minor / No-chord
-    is_maj = np.all(np.equal(ref_semitones[:, :8], maj_semitones), axis=1)
-    is_min = np.all(np.equal(ref_semitones[:, :8], min_semitones), axis=1)
-    is_none = np.logical_and(ref_roots < 0, np.all(ref_semitones == 0, axis=1))
+    ref_roots, ref_bitmaps = ref_encoded[:2]
+    est_roots, est_bitmaps = est_encoded[:2]
 
-    # Only keep majors, minors, and Nones (NOR)
-    comparison_scores[(is_maj + is_min + is_none) == 0] = -1
+    eq_root = ref_roots == est_roots
+    eq_semitones = ref_bitmaps == est_bitmaps
+    comparison_scores = (eq_root & eq_semitones).astype(float)
 
-    # Disable inversions that are not part of the quality
-    valid_inversion = np.ones(ref_bass.shape, dtype=bool)
-    bass_idx = ref_bass >= 0
-    valid_inversion[bass_idx] = ref_semitones[bass_idx, ref_bass[bass_idx]]
-    comparison_scores[valid_inversion == 0] = -1
+    # Test for reference chord inclusion
+    is_valid = np.in1d(ref_bitmaps, valid_semitones)
+    # Drop if NOR
+    comparison_scores[~is_valid] = -1
     return comparison_scores
 
 
@@ -1264,21 +1606,28 @@ def sevenths(reference_labels, estimated_labels):
 
     """
     validate(reference_labels, estimated_labels)
+    return _sevenths(_encode_packed(reference_labels),
+                     _encode_packed(estimated_labels))
+
+
+def _sevenths_inv(ref_encoded, est_encoded):
+    """Compute :func:`sevenths_inv` from packed chord encodings."""
     seventh_qualities = ['maj', 'min', 'maj7', '7', 'min7', '']
-    valid_semitones = np.array([QUALITIES[name] for name in seventh_qualities])
+    valid_semitones = [_packed_quality(name) for name in seventh_qualities]
 
-    ref_roots, ref_semitones = encode_many(reference_labels, False)[:2]
-    est_roots, est_semitones = encode_many(estimated_labels, False)[:2]
+    ref_roots, ref_bitmaps, ref_basses = ref_encoded
+    est_roots, est_bitmaps, est_basses = est_encoded
 
-    eq_root = ref_roots == est_roots
-    eq_semitones = np.all(np.equal(ref_semitones, est_semitones), axis=1)
-    comparison_scores = (eq_root * eq_semitones).astype(np.float)
+    eq_roots_basses = (ref_roots == est_roots) & (ref_basses == est_basses)
+    eq_semitones = ref_bitmaps == est_bitmaps
+    comparison_scores = (eq_roots_basses & eq_semitones).astype(float)
 
-    # Test for reference chord inclusion
-    is_valid = np.array([np.all(np.equal(ref_semitones, semitones), axis=1)
-                         for semitones in valid_semitones])
-    # Drop if NOR
-    comparison_scores[np.sum(is_valid, axis=0) == 0] = -1
+    # Test for Major / Minor / No-chord
+    is_valid = np.in1d(ref_bitmaps, valid_semitones)
+    comparison_scores[~is_valid] = -1
+
+    # Disable inversions that are not part of the quality
+    comparison_scores[~_has_bass(ref_bitmaps, ref_basses)] = -1
     return comparison_scores
 
 
@@ -1319,27 +1668,8 @@ def sevenths_inv(reference_labels, estimated_labels):
 
     """
     validate(reference_labels, estimated_labels)
-    seventh_qualities = ['maj', 'min', 'maj7', '7', 'min7', '']
-    valid_semitones = np.array([QUALITIES[name] for name in seventh_qualities])
-
-    ref_roots, ref_semitones, ref_basses = encode_many(reference_labels, False)
-    est_roots, est_semitones, est_basses = encode_many(estimated_labels, False)
-
-    eq_roots_basses = (ref_roots == est_roots) * (ref_basses == est_basses)
-    eq_semitones = np.all(np.equal(ref_semitones, est_semitones), axis=1)
-    comparison_scores = (eq_roots_basses * eq_semitones).astype(np.float)
-
-    # Test for Major / Minor / No-chord
-    is_valid = np.array([np.all(np.equal(ref_semitones, semitones), axis=1)
-                         for semitones in valid_semitones])
-    comparison_scores[np.sum(is_valid, axis=0) == 0] = -1
-
-    # Disable inversions that are not part of the quality
-    valid_inversion = np.ones(ref_basses.shape, dtype=bool)
-    bass_idx = ref_basses >= 0
-    valid_inversion[bass_idx] = ref_semitones[bass_idx, ref_basses[bass_idx]]
-    comparison_scores[valid_inversion == 0] = -1
-    return comparison_scores
+    return _sevenths_inv(_encode_packed(reference_labels),
+                         _encode_packed(estimated_labels))
 
 
 def evaluate(ref_intervals, ref_labels, est_intervals, est_labels, **kwargs):
@@ -1393,34 +1723,210 @@ def evaluate(ref_intervals, ref_labels, est_intervals, est_labels, **kwargs):
         ref_intervals, ref_labels, est_intervals, est_labels)
     # Convert intervals to durations (used as weights)
     durations = util.intervals_to_durations(intervals)
+    # Score each distinct pair of labels once, weighted by its total duration
+    ref_labels, est_labels, durations = unique_label_pairs(ref_labels,
+                                                           est_labels,
+                                                           durations)
+
+    # Validate and encode the labels once for all comparison functions
+    validate(ref_labels, est_labels)
+    ref_encoded = _encode_packed(ref_labels)
+    est_encoded = _encode_packed(est_labels)
 
     # Store scores for each comparison function
     scores = collections.OrderedDict()
 
-    scores['thirds'] = weighted_accuracy(thirds(ref_labels, est_labels),
-                                         durations)
-    scores['thirds_inv'] = weighted_accuracy(thirds_inv(ref_labels,
-                                                        est_labels), durations)
-    scores['triads'] = weighted_accuracy(triads(ref_labels, est_labels),
-                                         durations)
-    scores['triads_inv'] = weighted_accuracy(triads_inv(ref_labels,
-                                                        est_labels), durations)
-    scores['tetrads'] = weighted_accuracy(tetrads(ref_labels, est_labels),
-                                          durations)
-    scores['tetrads_inv'] = weighted_accuracy(tetrads_inv(ref_labels,
-                                                          est_labels),
-                                              durations)
-    scores['root'] = weighted_accuracy(root(ref_labels, est_labels), durations)
-    scores['mirex'] = weighted_accuracy(mirex(ref_labels, est_labels),
-                                        durations)
-    scores['majmin'] = weighted_accuracy(majmin(ref_labels, est_labels),
+    for name, comparison in [('thirds', _thirds),
+                             ('thirds_inv', _thirds_inv),
+                             ('triads', _triads),
+                             ('triads_inv', _triads_inv),
+                             ('tetrads', _tetrads),
+                             ('tetrads_inv', _tetrads_inv),
+                             ('root', _root),
+                             ('mirex', _mirex),
+                             ('majmin', _majmin),
+                             ('majmin_inv', _majmin_inv),
+                             ('sevenths', _sevenths),
+                             ('sevenths_inv', _sevenths_inv)]:
+        scores[name] = weighted_accuracy(comparison(ref_encoded, est_encoded),
                                          durations)
-    scores['majmin_inv'] = weighted_accuracy(majmin_inv(ref_labels,
-                                                        est_labels), durations)
-    scores['sevenths'] = weighted_accuracy(sevenths(ref_labels, est_labels),
-                                           durations)
-    scores['sevenths_inv'] = weighted_accuracy(sevenths_inv(ref_labels,
-                                                            est_labels),
-                                               durations)
 
     return scores
+
+
+# --- Confusion Matrices ---
+# Pitch class names used to label the classes of confusion matrices
+_PITCH_CLASS_NAMES = ['C', 'C#', 'D', 'Eb', 'E', 'F',
+                      'F#', 'G', 'Ab', 'A', 'Bb', 'B']
+
+# Chord vocabularies for confusion matrices, as the quality shorthands they
+# distinguish, and the mask of packed bitmap semitones which identify them.
+# An empty list of qualities distinguishes roots only.
+CONFUSION_VOCABULARIES = {
+    'root': ([], 0),
+    'majmin': (['maj', 'min'], _TRIAD_MASK),
+    'sevenths': (['maj', 'min', 'maj7', '7', 'min7'],
+                 (1 << BITMAP_LENGTH) - 1)}
+
+
+def confusion_classes(vocabulary='majmin'):
+    """List the chord classes of a confusion matrix vocabulary.
+
+    Each root is combined with each quality of the vocabulary, followed by
+    no-chord (``NO_CHORD``) and a final class for all other chords, which
+    is labeled ``X_CHORD``.
+
+    Parameters
+    ----------
+    vocabulary : str
+        One of ``'root'``, ``'majmin'`` or ``'sevenths'``
+        (Default value = 'majmin')
+
+    Returns
+    -------
+    classes : list of str
+        Chord label of each row and column of the confusion matrix.
+
+    Raises
+    ------
+    ValueError
+        If ``vocabulary`` is not supported.
+
+    """
+    if vocabulary not in CONFUSION_VOCABULARIES:
+        raise ValueError('Unsupported chord vocabulary: {}, expected one of '
+                         '{}'.format(vocabulary,
+                                     sorted(CONFUSION_VOCABULARIES)))
+    qualities = CONFUSION_VOCABULARIES[vocabulary][0]
+
+    classes = []
+    for pitch_class in _PITCH_CLASS_NAMES:
+        if qualities:
+            classes.extend(join(pitch_class, quality)
+                           for quality in qualities)
+        else:
+            classes.append(pitch_class)
+    return classes + [NO_CHORD, X_CHORD]
+
+
+def _confusion_codes(encoded, vocabulary):
+    """Map chords encoded by :func:`_encode_packed` to their class indices
+    in :func:`confusion_classes`."""
+    roots, bitmaps = encoded[:2]
+    qualities, mask = CONFUSION_VOCABULARIES[vocabulary]
+    n_qualities = max(len(qualities), 1)
+    n_chords = BITMAP_LENGTH * n_qualities
+
+    # Anything which is not matched below falls in the final 'X' class
+    codes = np.empty(len(roots), dtype=np.int64)
+    codes.fill(n_chords + 1)
+
+    has_root = roots >= 0
+    if qualities:
+        for index, quality in enumerate(qualities):
+            is_quality = has_root & ((bitmaps & mask) ==
+                                     (_packed_quality(quality) & mask))
+            codes[is_quality] = roots[is_quality] * n_qualities + index
+    else:
+        codes[has_root] = roots[has_root]
+
+    codes[(roots < 0) & (bitmaps == 0)] = n_chords
+    return codes
+
+
+def confusion_matrix(ref_intervals, ref_labels, est_intervals, est_labels,
+                     vocabulary='majmin', confusion=None):
+    """Compute the duration-weighted confusion matrix between reference and
+    estimated chords.
+
+    Chords are compared as in :func:`mir_eval.chord.root`,
+    :func:`mir_eval.chord.majmin` or :func:`mir_eval.chord.sevenths`, so that
+    the diagonal (excluding the final 'X' row) holds the correctly estimated
+    durations of those metrics.  For the ``'root'`` vocabulary, estimated
+    'X' chords have no root and are therefore counted as no-chord.
+    Matrices from different tracks can be summed, or accumulated in place
+    with ``confusion``, so that a corpus can be analyzed without keeping its
+    labels.
+
+    Examples
+    --------
+    >>> classes = mir_eval.chord.confusion_classes('majmin')
+    >>> confusion = np.zeros((len(classes), len(classes)))
+    >>> for ref_file, est_file in zip(ref_files, est_files):
+    ...     (ref_intervals,
+    ...      ref_labels) = mir_eval.io.load_labeled_intervals(ref_file)
+    ...     (est_intervals,
+    ...      est_labels) = mir_eval.io.load_labeled_intervals(est_file)
+    ...     mir_eval.chord.confusion_matrix(ref_intervals, ref_labels,
+    ...                                     est_intervals, est_labels,
+    ...                                     vocabulary='majmin',
+    ...                                     confusion=confusion)
+
+    Parameters
+    ----------
+    ref_intervals : np.ndarray, shape=(n, 2)
+        Reference chord intervals, in the format returned by
+        :func:`mir_eval.io.load_labeled_intervals`.
+
+    ref_labels : list, shape=(n,)
+        reference chord labels, in the format returned by
+        :func:`mir_eval.io.load_labeled_intervals`.
+
+    est_intervals : np.ndarray, shape=(m, 2)
+        estimated chord intervals, in the format returned by
+        :func:`mir_eval.io.load_labeled_intervals`.
+
+    est_labels : list, shape=(m,)
+        estimated chord labels, in the format returned by
+        :func:`mir_eval.io.load_labeled_intervals`.
+
+    vocabulary : str
+        Granularity of the chord classes: ``'root'``, ``'majmin'`` or
+        ``'sevenths'``.  See :func:`confusion_classes`.
+        (Default value = 'majmin')
+
+    confusion : np.ndarray, shape=(k, k), optional
+        If provided, durations are added to this matrix in place.
+
+    Returns
+    -------
+    confusion : np.ndarray, shape=(k, k)
+        ``confusion[i, j]`` is the total duration for which the reference
+        chord is of class ``i`` and the estimated chord of class ``j``.
+
+    Raises
+    ------
+    ValueError
+        If ``vocabulary`` is not supported, or ``confusion`` has the wrong
+        shape.
+
+    """
+    n_classes = len(confusion_classes(vocabulary))
+    if confusion is None:
+        confusion = np.zeros((n_classes, n_classes))
+    elif confusion.shape != (n_classes, n_classes):
+        raise ValueError('confusion should have shape {}, got '
+                         '{}'.format((n_classes, n_classes), confusion.shape))
+
+    # Align the estimate with the reference, as in evaluate
+    est_intervals, est_labels = util.adjust_intervals(
+        est_intervals, est_labels, ref_intervals.min(), ref_intervals.max(),
+        NO_CHORD, NO_CHORD)
+    intervals, ref_labels, est_labels = util.merge_labeled_intervals(
+        ref_intervals, ref_labels, est_intervals, est_labels)
+    durations = util.intervals_to_durations(intervals)
+    ref_labels, est_labels, durations = unique_label_pairs(ref_labels,
+                                                           est_labels,
+                                                           durations)
+    validate(ref_labels, est_labels)
+
+    ref_codes = _confusion_codes(_encode_packed(ref_labels), vocabulary)
+    est_codes = _confusion_codes(_encode_packed(est_labels), vocabulary)
+
+    # root only compares roots, so an estimated 'X' has no root and matches
+    # a reference no-chord
+    if not CONFUSION_VOCABULARIES[vocabulary][0]:
+        est_codes[est_codes == n_classes - 1] = n_classes - 2
+
+    np.add.at(confusion, (ref_codes, est_codes), durations)
+    return confusion
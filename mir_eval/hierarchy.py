@@ -41,9 +41,9 @@ References
 '''
 
 import numpy as np
-import scipy.sparse
 import collections
 import itertools
+import multiprocessing
 import warnings
 
 from . import util
@@ -99,13 +99,18 @@ def _hierarchy_bounds(intervals_hier):
 
 
 def _lca(intervals_hier, frame_size):
-    '''Compute the (sparse) least-common-ancestor (LCA) matrix for a
+    '''Compute the (implicit) least-common-ancestor (LCA) matrix for a
     hierarchical segmentation.
 
     For any pair of frames ``(s, t)``, the LCA is the deepest level in
     the hierarchy such that ``(s, t)`` are contained within a single
     segment at that level.
 
+    Rather than storing the full ``(n_frames, n_frames)`` LCA matrix, this
+    stores the index of the segment containing each frame at each level.
+    Entries of the LCA matrix can then be computed on demand by
+    :func:`_lca_row`.
+
     Parameters
     ----------
     intervals_hier : list of ndarray
@@ -117,9 +122,9 @@ def _lca(intervals_hier, frame_size):
 
     Returns
     -------
-    lca_matrix : scipy.sparse.csr_matrix
-        A sparse matrix such that ``lca_matrix[i, j]`` contains the depth
-        of the deepest segment containing frames ``i`` and ``j``.
+    segment_ids : np.ndarray, shape=(n_levels, n_frames)
+        ``segment_ids[l, i]`` is the index of the segment containing frame
+        ``i`` at depth ``l + 1``, or ``-1`` if no segment contains it.
     '''
 
     frame_size = float(frame_size)
@@ -131,118 +136,432 @@ def _lca(intervals_hier, frame_size):
     n = int((_round(n_end, frame_size) -
              _round(n_start, frame_size)) / frame_size)
 
-    # Initialize the LCA matrix
-    lca_matrix = scipy.sparse.lil_matrix((n, n), dtype=np.uint8)
+    # Initialize the segment index of each frame, at each level
+    segment_ids = -np.ones((len(intervals_hier), n), dtype=int)
 
-    for level, intervals in enumerate(intervals_hier, 1):
-        for ival in (_round(np.asarray(intervals),
-                            frame_size) / frame_size).astype(int):
-            idx = slice(ival[0], ival[1])
-            lca_matrix[idx, idx] = level
+    for level, intervals in enumerate(intervals_hier):
+        for segment, ival in enumerate((_round(np.asarray(intervals),
+                                               frame_size) /
+                                        frame_size).astype(int)):
+            segment_ids[level, ival[0]:ival[1]] = segment
 
-    return lca_matrix.tocsr()
+    return segment_ids
 
 
-def _gauc(ref_lca, est_lca, transitive, window):
-    '''Generalized area under the curve (GAUC)
+def _lca_row(segment_ids, query, results):
+    '''Compute a row of the least-common-ancestor (LCA) matrix from its
+    implicit representation.
 
-    This function computes the normalized recall score for correctly
-    ordering triples ``(q, i, j)`` where frames ``(q, i)`` are closer than
-    ``(q, j)`` in the reference annotation.
+    Parameters
+    ----------
+    segment_ids : np.ndarray, shape=(n_levels, n_frames)
+        The implicit LCA matrix, as computed by :func:`_lca`
+
+    query : int
+        The index of the query frame (row)
+
+    results : slice
+        The result frames (columns) to compute
+
+    Returns
+    -------
+    lca_row : np.ndarray, dtype=np.uint8
+        The depth of the deepest segment containing both ``query`` and each
+        frame in ``results``, or 0 if there is none.
+    '''
+    query_ids = segment_ids[:, query:query + 1]
+    same_segment = ((segment_ids[:, results] == query_ids) &
+                    (query_ids >= 0))
+
+    # The LCA is the deepest level at which the frames share a segment
+    depths = np.arange(1, segment_ids.shape[0] + 1, dtype=np.uint8)
+    return np.max(same_segment * depths[:, np.newaxis], axis=0)
+
+
+def _lca_band(segment_ids, window):
+    '''Compute the diagonal band of the least-common-ancestor (LCA) matrix.
+
+    Only the entries within ``window`` frames of the diagonal are stored, so
+    that the band takes ``O(n * window)`` memory, and each of its rows holds
+    the LCA depths of a query frame against all of its results.
 
     Parameters
     ----------
-    ref_lca : scipy.sparse
-    est_lca : scipy.sparse
-        The least common ancestor matrices for the reference and
-        estimated annotations
+    segment_ids : np.ndarray, shape=(n_levels, n_frames)
+        The implicit LCA matrix, as computed by :func:`_lca`
+
+    window : int > 0
+        The number of frames to either side of the diagonal
+
+    Returns
+    -------
+    lca_band : np.ndarray, shape=(n_frames, 2 * window), dtype=np.uint8
+        ``lca_band[q, k]`` is the LCA depth of frames ``q`` and
+        ``q - window + k``, or 0 if that frame is out of range.
+    '''
+    n_levels, n = segment_ids.shape
+
+    depths = np.arange(1, n_levels + 1, dtype=np.uint8)[:, np.newaxis]
+
+    # Fill in one diagonal at a time, each as a contiguous row
+    band = np.zeros((2 * window, n), dtype=np.uint8)
+
+    for k, offset in enumerate(range(-window, window)):
+        start, stop = max(0, -offset), min(n, n - offset)
+        if start >= stop:
+            continue
+
+        query_ids = segment_ids[:, start:stop]
+        same_segment = ((segment_ids[:, start + offset:stop + offset] ==
+                         query_ids) & (query_ids >= 0))
+        band[k, start:stop] = np.max(same_segment * depths, axis=0)
+
+    return np.ascontiguousarray(band.T)
+
+
+def _joint_histogram(ref_score, est_score):
+    '''Count the results of a query at each pair of LCA depths.
+
+    Parameters
+    ----------
+    ref_score : np.ndarray, shape=(m,)
+    est_score : np.ndarray, shape=(m,)
+        The reference and estimated LCA depths of each result
+        with respect to the query, as computed by :func:`_lca_row`
+
+    Returns
+    -------
+    joint : np.ndarray, shape=(n_levels, n_levels)
+        ``joint[a, b]`` is the number of results with reference depth ``a``
+        and estimated depth ``b``
+    '''
+    n_levels = 1
+    if len(ref_score):
+        n_levels += int(max(ref_score.max(), est_score.max()))
+
+    joint = np.bincount(ref_score.astype(np.int64) * n_levels + est_score,
+                        minlength=n_levels**2)
+    return joint.reshape((n_levels, n_levels))
+
+
+def _count_triples(joint, transitive):
+    '''Count the reference-ordered pairs of results for a single query,
+    and how many of them are ordered the same way by the estimate.
+
+    Rather than comparing all pairs of results, the pair counts follow from
+    cumulative sums over the joint histogram of LCA depths, since the depths
+    take only a handful of distinct values.  Passing ``joint.T`` swaps the
+    roles of the reference and the estimate.
+
+    Parameters
+    ----------
+    joint : np.ndarray, shape=(n_levels, n_levels)
+        The joint histogram of reference and estimated depths,
+        as computed by :func:`_joint_histogram`
 
     transitive : bool
-        If True, then transitive comparisons are counted, meaning that
-        ``(q, i)`` and ``(q, j)`` can differ by any number of levels.
+        If True, count pairs ``(i, j)`` with
+        ``ref_score[i] > ref_score[j]``.
+
+        If False, count pairs ``(i, j)`` with
+        ``ref_score[i] == ref_score[j] + 1``.
+
+    Returns
+    -------
+    normalizer : int
+        The number of pairs ``(i, j)`` ordered by the reference
+
+    n_correct : int
+        The number of those pairs which also have
+        ``est_score[i] > est_score[j]``
+    '''
+    # est_below[a, b] counts the results with ref depth a and est depth < b
+    est_below = np.cumsum(joint, axis=1) - joint
+    ref_counts = joint.sum(axis=1)
+
+    if transitive:
+        # Compare against all results with a shallower reference depth
+        lower = np.cumsum(est_below, axis=0) - est_below
+        ref_lower = np.cumsum(ref_counts) - ref_counts
+    else:
+        # Compare only against results exactly one level shallower
+        lower = np.zeros_like(est_below)
+        lower[1:] = est_below[:-1]
+        ref_lower = np.zeros_like(ref_counts)
+        ref_lower[1:] = ref_counts[:-1]
+
+    normalizer = np.sum(ref_counts * ref_lower)
+    n_correct = np.sum(joint * lower)
+
+    return normalizer, n_correct
+
+
+def _query_scores(ref_lca, est_lca, window, banded, start, stop):
+    '''Compute the triple-ordering scores of each query frame in a range.
+
+    Parameters
+    ----------
+    ref_lca : np.ndarray
+    est_lca : np.ndarray
+        The least common ancestor matrices for the reference and
+        estimated annotations, either implicit as computed by :func:`_lca`,
+        or banded as computed by :func:`_lca_band`
+
+    window : int
+        The maximum number of frames to consider for each query
+
+    banded : bool
+        Whether ``ref_lca`` and ``est_lca`` are banded
+
+    start : int
+    stop : int
+        The range of query frames ``[start, stop)`` to score
+
+    Returns
+    -------
+    scores : np.ndarray, shape=(stop - start, 2, 2)
+        ``scores[i, transitive, 0]`` is the fraction of reference triples
+        correctly ordered by the estimate for the ``i`` th query, and
+        ``scores[i, transitive, 1]`` the fraction of estimated triples
+        correctly ordered by the reference.  Queries for which no triples
+        are ordered have score ``np.nan``.
+    '''
+    if banded:
+        n = ref_lca.shape[0]
+    else:
+        n = ref_lca.shape[1]
+
+    scores = np.empty((stop - start, 2, 2))
+    scores.fill(np.nan)
+
+    for i, query in enumerate(range(start, stop)):
+
+        # Find all pairs i,j such that ref_lca[q, i] > ref_lca[q, j]
+        if banded:
+            # Column k of the band holds frame query - window + k
+            results = slice(max(0, window - query),
+                            min(2 * window, n - query + window))
+            ref_score = ref_lca[query, results]
+            est_score = est_lca[query, results]
+        else:
+            results = slice(max(0, query - window), min(n, query + window))
+            ref_score = _lca_row(ref_lca, query, results)
+            est_score = _lca_row(est_lca, query, results)
+
+        # Don't count the query as a result
+        # when query < window, query itself is the index within the slice
+        # otherwise, query is located at the center of the slice, window
+        # (this also holds when the slice goes off the end of the array.)
+        idx = min(query, window)
+        joint = _joint_histogram(np.delete(ref_score, idx),
+                                 np.delete(est_score, idx))
+
+        for transitive in [False, True]:
+            for direction, counts in enumerate([joint, joint.T]):
+                normalizer, n_correct = _count_triples(counts, transitive)
+
+                if normalizer > 0:
+                    scores[i, int(transitive), direction] = (
+                        n_correct / float(normalizer))
+
+    return scores
+
+
+# Arguments shared by all query chunks in a worker process
+_WORKER_ARGS = {}
+
+
+def _init_worker(function, args):
+    '''Store the shared arguments of :func:`_map_queries` in a worker.'''
+    _WORKER_ARGS['function'] = function
+    _WORKER_ARGS['args'] = args
+
+
+def _run_worker(query_range):
+    '''Apply the shared function of a worker to a range of queries.'''
+    args = _WORKER_ARGS['args'] + tuple(query_range)
+    return _WORKER_ARGS['function'](*args)
+
+
+def _map_queries(function, n, n_jobs, *args):
+    '''Evaluate ``function(*args, start, stop)`` over all query frames,
+    optionally splitting the queries into chunks across worker processes.
+
+    The arguments are sent to each worker once, and the chunks are
+    reassembled in order, so that the result does not depend on
+    ``n_jobs``.
+
+    Parameters
+    ----------
+    function : callable
+        A module-level function returning an array of per-query results
+        for the queries ``[start, stop)``
+
+    n : int
+        The total number of query frames
+
+    n_jobs : int or None
+        The number of worker processes to use.  If ``None`` or 1, all
+        queries are evaluated in the calling process.  Negative values
+        count back from the number of CPUs, so that ``-1`` uses all of them.
+
+    *args
+        Additional positional arguments to ``function``
+
+    Returns
+    -------
+    results : np.ndarray
+        The per-query results, concatenated along the first axis
+
+    Raises
+    ------
+    ValueError
+        If ``n_jobs == 0``
+    '''
+    if n_jobs is None:
+        n_jobs = 1
+    elif n_jobs == 0:
+        raise ValueError('n_jobs must be a non-zero integer.')
+    elif n_jobs < 0:
+        n_jobs = max(1, multiprocessing.cpu_count() + 1 + n_jobs)
+
+    n_jobs = min(n_jobs, n)
+
+    if n_jobs <= 1:
+        return function(*(args + (0, n)))
+
+    bounds = np.linspace(0, n, num=n_jobs + 1).astype(int)
+    query_ranges = [(int(start), int(stop))
+                    for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    pool = multiprocessing.Pool(n_jobs, initializer=_init_worker,
+                                initargs=(function, args))
+    try:
+        results = pool.map(_run_worker, query_ranges)
+    finally:
+        pool.close()
+        pool.join()
+
+    return np.concatenate(results)
 
-        If False, then ``(q, i)`` and ``(q, j)`` can differ by exactly one
-        level.
+
+def _gauc_scores(ref_lca, est_lca, window, n_jobs=None):
+    '''Generalized area under the curve (GAUC) in both directions and
+    for both transitive and non-transitive comparisons.
+
+    Parameters
+    ----------
+    ref_lca : np.ndarray
+    est_lca : np.ndarray
+        The (implicit) least common ancestor matrices for the reference and
+        estimated annotations, as computed by :func:`_lca`
 
     window : number or None
         The maximum number of frames to consider for each query.
         If `None`, then all frames are considered.
 
+    n_jobs : int or None
+        The number of worker processes over which to split the query
+        frames.  See :func:`_map_queries`.
+
     Returns
     -------
-    score : number [0, 1]
-        The percentage of reference triples correctly ordered by
-        the estimation.
+    scores : np.ndarray, shape=(2, 2)
+        ``scores[transitive]`` holds the GAUC of ``ref_lca`` against
+        ``est_lca`` and of ``est_lca`` against ``ref_lca``, as computed by
+        :func:`_gauc`.
 
     Raises
     ------
     ValueError
-        If ``ref_lca`` and ``est_lca`` have different shapes
+        If ``ref_lca`` and ``est_lca`` have different numbers of frames
     '''
     # Make sure we have the right number of frames
 
-    if ref_lca.shape != est_lca.shape:
+    if ref_lca.shape[1] != est_lca.shape[1]:
         raise ValueError('Estimated and reference hierarchies '
                          'must have the same shape.')
 
     # How many frames?
-    n = ref_lca.shape[0]
+    n = ref_lca.shape[1]
 
     # By default, the window covers the entire track
     if window is None:
         window = n
 
-    # Initialize the score
-    score = 0.0
-
-    # Iterate over query frames
-    num_frames = 0
+    # When the window is narrower than the track, only the diagonal band
+    # of the LCA matrices is ever read, so build it up front
+    banded = window < n
+    if banded:
+        ref_lca = _lca_band(ref_lca, window)
+        est_lca = _lca_band(est_lca, window)
+
+    query_scores = _map_queries(_query_scores, n, n_jobs,
+                                ref_lca, est_lca, window, banded)
+
+    scores = np.zeros((2, 2))
+    for transitive in [0, 1]:
+        for direction in [0, 1]:
+            frame_scores = query_scores[:, transitive, direction]
+
+            # Add up agreement for the frames which order any triples,
+            # in query order so that the sum does not depend on n_jobs
+            score = 0.0
+            num_frames = 0
+            for frame_score in frame_scores[~np.isnan(frame_scores)]:
+                score += frame_score
+                num_frames += 1
+
+            # Normalize by the number of frames counted.
+            # If no frames are counted, take the convention 0/0 -> 0
+            if num_frames:
+                scores[transitive, direction] = score / float(num_frames)
 
-    for query in range(n):
+    return scores
 
-        # Find all pairs i,j such that ref_lca[q, i] > ref_lca[q, j]
-        results = slice(max(0, query - window), min(n, query + window))
 
-        ref_score = ref_lca[query, results]
-        est_score = est_lca[query, results]
+def _gauc(ref_lca, est_lca, transitive, window, n_jobs=None):
+    '''Generalized area under the curve (GAUC)
 
-        # Densify the results
-        ref_score = np.asarray(ref_score.todense()).squeeze()
-        est_score = np.asarray(est_score.todense()).squeeze()
+    This function computes the normalized recall score for correctly
+    ordering triples ``(q, i, j)`` where frames ``(q, i)`` are closer than
+    ``(q, j)`` in the reference annotation.
 
-        if transitive:
-            # Transitive: count comparisons across any level
-            ref_rank = np.greater.outer(ref_score, ref_score)
-        else:
-            # Non-transitive: count comparisons only across immediate levels
-            ref_rank = np.equal.outer(ref_score, ref_score + 1)
+    Parameters
+    ----------
+    ref_lca : np.ndarray
+    est_lca : np.ndarray
+        The (implicit) least common ancestor matrices for the reference and
+        estimated annotations, as computed by :func:`_lca`
 
-        est_rank = np.greater.outer(est_score, est_score)
+    transitive : bool
+        If True, then transitive comparisons are counted, meaning that
+        ``(q, i)`` and ``(q, j)`` can differ by any number of levels.
 
-        # Don't count the query as a result
-        # when query < window, query itself is the index within the slice
-        # otherwise, query is located at the center of the slice, window
-        # (this also holds when the slice goes off the end of the array.)
-        idx = min(query, window)
-        ref_rank[idx, :] = False
-        ref_rank[:, idx] = False
+        If False, then ``(q, i)`` and ``(q, j)`` can differ by exactly one
+        level.
 
-        # Compute normalization constant
-        normalizer = float(ref_rank.sum())
+    window : number or None
+        The maximum number of frames to consider for each query.
+        If `None`, then all frames are considered.
 
-        # Add up agreement for frames
-        if normalizer > 0:
-            score += np.sum(np.logical_and(ref_rank, est_rank)) / normalizer
-            num_frames += 1
+    n_jobs : int or None
+        The number of worker processes over which to split the query
+        frames.  See :func:`_map_queries`.
 
-    # Normalize by the number of frames counted.
-    # If no frames are counted, take the convention 0/0 -> 0
-    if num_frames:
-        score /= float(num_frames)
-    else:
-        score = 0.0
+    Returns
+    -------
+    score : number [0, 1]
+        The percentage of reference triples correctly ordered by
+        the estimation.
 
-    return score
+    Raises
+    ------
+    ValueError
+        If ``ref_lca`` and ``est_lca`` have different numbers of frames
+    '''
+    return _gauc_scores(ref_lca, est_lca, window,
+                        n_jobs=n_jobs)[int(transitive), 0]
 
 
 def validate_hier_intervals(intervals_hier):
@@ -281,8 +600,53 @@ def validate_hier_intervals(intervals_hier):
         boundaries |= new_bounds
 
 
+def _tmeasure_scores(reference_intervals_hier, estimated_intervals_hier,
+                     window=15.0, frame_size=0.1, n_jobs=None):
+    '''Compute the T-measure recall and precision scores in both the
+    transitive and non-transitive modes, building the least common ancestor
+    matrices only once.
+
+    See :func:`tmeasure` for a description of the parameters.
+
+    Returns
+    -------
+    scores : np.ndarray, shape=(2, 2)
+        ``scores[transitive]`` contains ``(t_recall, t_precision)``
+
+    Raises
+    ------
+    ValueError
+        See :func:`tmeasure`
+    '''
+
+    # Compute the number of frames in the window
+    if frame_size <= 0:
+        raise ValueError('frame_size ({:.2f}) must be a positive '
+                         'number.'.format(frame_size))
+
+    if window is None:
+        window_frames = None
+    else:
+        if frame_size > window:
+            raise ValueError('frame_size ({:.2f}) cannot exceed '
+                             'window ({:.2f})'.format(frame_size, window))
+
+        window_frames = int(_round(window, frame_size) / frame_size)
+
+    # Validate the hierarchical segmentations
+    validate_hier_intervals(reference_intervals_hier)
+    validate_hier_intervals(estimated_intervals_hier)
+
+    # Build the least common ancestor matrices
+    ref_lca = _lca(reference_intervals_hier, frame_size)
+    est_lca = _lca(estimated_intervals_hier, frame_size)
+
+    return _gauc_scores(ref_lca, est_lca, window_frames, n_jobs=n_jobs)
+
+
 def tmeasure(reference_intervals_hier, estimated_intervals_hier,
-             transitive=False, window=15.0, frame_size=0.1, beta=1.0):
+             transitive=False, window=15.0, frame_size=0.1, beta=1.0,
+             n_jobs=None):
     '''Computes the tree measures for hierarchical segment annotations.
 
     Parameters
@@ -310,6 +674,11 @@ def tmeasure(reference_intervals_hier, estimated_intervals_hier,
     beta : float > 0
         beta parameter for the F-measure.
 
+    n_jobs : int or None
+        number of worker processes over which to split the query frames.
+        If ``None`` or 1, no worker processes are started.  If negative,
+        ``-1`` uses all CPUs, ``-2`` all but one, and so on.
+
     Returns
     -------
     t_precision : number [0, 1]
@@ -329,33 +698,17 @@ def tmeasure(reference_intervals_hier, estimated_intervals_hier,
         If the input hierarchies have different time durations
 
         If ``frame_size > window`` or ``frame_size <= 0``
-    '''
-
-    # Compute the number of frames in the window
-    if frame_size <= 0:
-        raise ValueError('frame_size ({:.2f}) must be a positive '
-                         'number.'.format(frame_size))
-
-    if window is None:
-        window_frames = None
-    else:
-        if frame_size > window:
-            raise ValueError('frame_size ({:.2f}) cannot exceed '
-                             'window ({:.2f})'.format(frame_size, window))
-
-        window_frames = int(_round(window, frame_size) / frame_size)
 
-    # Validate the hierarchical segmentations
-    validate_hier_intervals(reference_intervals_hier)
-    validate_hier_intervals(estimated_intervals_hier)
+        If ``n_jobs == 0``
+    '''
 
-    # Build the least common ancestor matrices
-    ref_lca = _lca(reference_intervals_hier, frame_size)
-    est_lca = _lca(estimated_intervals_hier, frame_size)
+    scores = _tmeasure_scores(reference_intervals_hier,
+                              estimated_intervals_hier,
+                              window=window, frame_size=frame_size,
+                              n_jobs=n_jobs)
 
     # Compute precision and recall
-    t_recall = _gauc(ref_lca, est_lca, transitive, window_frames)
-    t_precision = _gauc(est_lca, ref_lca, transitive, window_frames)
+    t_recall, t_precision = scores[int(transitive)]
 
     t_measure = util.f_measure(t_precision, t_recall, beta=beta)
 
@@ -455,21 +808,19 @@ def evaluate(ref_intervals_hier, ref_labels_hier,
 
     scores = collections.OrderedDict()
 
-    # Force the transitivity setting
-    kwargs['transitive'] = False
-    (scores['T-Precision reduced'],
-     scores['T-Recall reduced'],
-     scores['T-Measure reduced']) = util.filter_kwargs(tmeasure,
-                                                       ref_intervals_hier,
-                                                       est_intervals_hier,
-                                                       **kwargs)
-
-    kwargs['transitive'] = True
-    (scores['T-Precision full'],
-     scores['T-Recall full'],
-     scores['T-Measure full']) = util.filter_kwargs(tmeasure,
-                                                    ref_intervals_hier,
-                                                    est_intervals_hier,
-                                                    **kwargs)
+    # Compute the reduced and full T-measures from the same LCA matrices
+    t_scores = util.filter_kwargs(_tmeasure_scores,
+                                  ref_intervals_hier,
+                                  est_intervals_hier,
+                                  **kwargs)
+
+    beta = kwargs.get('beta', 1.0)
+
+    for transitive, mode in [(False, 'reduced'), (True, 'full')]:
+        t_recall, t_precision = t_scores[int(transitive)]
+        scores['T-Precision ' + mode] = t_precision
+        scores['T-Recall ' + mode] = t_recall
+        scores['T-Measure ' + mode] = util.f_measure(t_precision, t_recall,
+                                                     beta=beta)
 
     return scores
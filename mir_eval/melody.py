@@ -244,34 +244,85 @@ def resample_melody_series(times, frequencies, voicing,
     if kind != 'zero' and kind != 'nearest':
         # Fill in zero values with the last reported frequency
         # to avoid erroneous values when resampling
-        frequencies_held = np.array(frequencies)
-        for n, frequency in enumerate(frequencies[1:]):
-            if frequency == 0:
-                frequencies_held[n + 1] = frequencies_held[n]
+        held_indices = np.where(frequencies != 0,
+                                np.arange(len(frequencies)), 0)
+        frequencies_held = frequencies[np.maximum.accumulate(held_indices)]
         # Linearly interpolate frequencies
-        frequencies_resampled = scipy.interpolate.interp1d(times,
-                                                           frequencies_held,
-                                                           kind)(times_new)
+        frequencies_resampled = _interpolate(times, frequencies_held,
+                                             times_new, kind)
         # Retain zeros
-        frequency_mask = scipy.interpolate.interp1d(times,
-                                                    frequencies,
-                                                    'zero')(times_new)
+        frequency_mask = _interpolate(times, frequencies, times_new, 'zero')
         frequencies_resampled *= (frequency_mask != 0)
     else:
-        frequencies_resampled = scipy.interpolate.interp1d(times,
-                                                           frequencies,
-                                                           kind)(times_new)
+        frequencies_resampled = _interpolate(times, frequencies,
+                                             times_new, kind)
     # Use nearest-neighbor for voicing if it was used for frequencies
     if kind == 'nearest':
-        voicing_resampled = scipy.interpolate.interp1d(times,
-                                                       voicing,
-                                                       kind)(times_new)
+        voicing_resampled = _interpolate(times, voicing, times_new, kind)
     # otherwise, always use zeroth order
     else:
-        voicing_resampled = scipy.interpolate.interp1d(times,
-                                                       voicing,
-                                                       'zero')(times_new)
-    return frequencies_resampled, voicing_resampled.astype(np.bool)
+        voicing_resampled = _interpolate(times, voicing, times_new, 'zero')
+    return frequencies_resampled, voicing_resampled.astype(bool)
+
+
+def _interpolate(times, values, times_new, kind):
+    """Evaluates ``scipy.interpolate.interp1d(times, values, kind)`` at
+    ``times_new``.
+
+    The 'linear', 'zero' and 'nearest' kinds are computed directly with
+    :func:`numpy.interp` and :func:`numpy.searchsorted`, which avoids
+    building an interpolator object; other kinds are passed to
+    :class:`scipy.interpolate.interp1d`.
+
+    Parameters
+    ----------
+    times : np.ndarray
+        Times of each value
+    values : np.ndarray
+        Array of values to interpolate
+    times_new : np.ndarray
+        Times to interpolate values at, within the range of ``times``
+    kind : str
+        kind parameter of scipy.interpolate.interp1d
+
+    Returns
+    -------
+    values_new : np.ndarray
+        Interpolated values at ``times_new``
+
+    Raises
+    ------
+    ValueError
+        If any of ``times_new`` is outside the range of ``times``
+
+    """
+    if kind not in ('linear', 'zero', 'nearest'):
+        return scipy.interpolate.interp1d(times, values, kind)(times_new)
+
+    values = np.asarray(values, dtype=np.float64)
+    # interp1d sorts its samples by time
+    if np.any(times[1:] < times[:-1]):
+        order = np.argsort(times, kind='mergesort')
+        times, values = times[order], values[order]
+
+    if len(times_new) and (times_new.min() < times[0] or
+                           times_new.max() > times[-1]):
+        raise ValueError('A value in times_new is outside the interpolation '
+                         'range [{}, {}]'.format(times[0], times[-1]))
+
+    if kind == 'linear':
+        return np.interp(times_new, times, values)
+
+    if kind == 'zero':
+        # Hold the last sample at or before each new time
+        indices = np.searchsorted(times, times_new, side='right') - 1
+    else:
+        # Take the nearest sample, rounding halfway points down
+        bounds = times / 2.0
+        bounds = bounds[1:] + bounds[:-1]
+        indices = np.searchsorted(bounds, times_new, side='left')
+
+    return values[np.clip(indices, 0, len(times) - 1)]
 
 
 def to_cent_voicing(ref_time, ref_freq, est_time, est_freq, base_frequency=10.,
@@ -396,6 +447,28 @@ def voicing_measures(ref_voicing, est_voicing):
     if ref_voicing.size == 0 or est_voicing.size == 0:
         return 0.
 
+    return _voicing_measures(ref_voicing, est_voicing)
+
+
+def _voicing_measures(ref_voicing, est_voicing):
+    """Compute the voicing recall and false alarm rates from boolean voicing
+    arrays which have already been validated.
+
+    Parameters
+    ----------
+    ref_voicing : np.ndarray, dtype=bool
+        Reference boolean voicing array
+    est_voicing : np.ndarray, dtype=bool
+        Estimated boolean voicing array
+
+    Returns
+    -------
+    vx_recall : float
+        Voicing recall rate
+    vx_false_alarm : float
+        Voicing false alarm rate
+
+    """
     # How voicing is computed
     #        | ref_v | !ref_v |
     # -------|-------|--------|
@@ -476,6 +549,31 @@ def raw_pitch_accuracy(ref_voicing, ref_cent, est_voicing, est_cent,
     if ref_voicing.size == 0 or est_voicing.size == 0 \
        or ref_cent.size == 0 or est_cent.size == 0:
         return 0.
+
+    return _raw_pitch_accuracy(ref_voicing, np.abs(ref_cent - est_cent),
+                               cent_tolerance)
+
+
+def _raw_pitch_accuracy(ref_voicing, cent_diff, cent_tolerance):
+    """Compute the raw pitch accuracy from a validated reference voicing array
+    and the absolute difference between reference and estimated cents.
+
+    Parameters
+    ----------
+    ref_voicing : np.ndarray, dtype=bool
+        Reference boolean voicing array
+    cent_diff : np.ndarray
+        Absolute difference between the reference and estimated pitch
+        sequences, in cents
+    cent_tolerance : float
+        Maximum absolute deviation for a cent value to be considered correct
+
+    Returns
+    -------
+    raw_pitch : float
+        Raw pitch accuracy
+
+    """
     # If there are no voiced frames in reference, metric is 0
     if ref_voicing.sum() == 0:
         return 0.
@@ -483,7 +581,7 @@ def raw_pitch_accuracy(ref_voicing, ref_cent, est_voicing, est_cent,
     # Raw pitch = the number of voiced frames in the reference for which the
     # estimate provides a correct frequency value (within cent_tolerance cents)
     # NB: voicing estimation is ignored in this measure
-    frame_correct = (np.abs(ref_cent - est_cent)[ref_voicing] < cent_tolerance)
+    frame_correct = (cent_diff[ref_voicing] < cent_tolerance)
     raw_pitch = (frame_correct).sum()/float(ref_voicing.sum())
 
     return raw_pitch
@@ -556,12 +654,35 @@ def raw_chroma_accuracy(ref_voicing, ref_cent, est_voicing, est_cent,
        or ref_cent.size == 0 or est_cent.size == 0:
         return 0.
 
+    return _raw_chroma_accuracy(ref_voicing, np.abs(ref_cent - est_cent),
+                                cent_tolerance)
+
+
+def _raw_chroma_accuracy(ref_voicing, cent_diff, cent_tolerance):
+    """Compute the raw chroma accuracy from a validated reference voicing
+    array and the absolute difference between reference and estimated cents.
+
+    Parameters
+    ----------
+    ref_voicing : np.ndarray, dtype=bool
+        Reference boolean voicing array
+    cent_diff : np.ndarray
+        Absolute difference between the reference and estimated pitch
+        sequences, in cents
+    cent_tolerance : float
+        Maximum absolute deviation for a cent value to be considered correct
+
+    Returns
+    -------
+    raw_chroma : float
+        Raw chroma accuracy
+
+    """
     # If there are no voiced frames in reference, metric is 0
     if ref_voicing.sum() == 0:
         return 0.
 
     # Raw chroma = same as raw pitch except that octave errors are ignored.
-    cent_diff = np.abs(ref_cent - est_cent)
     octave = 1200*np.floor(cent_diff/1200.0 + 0.5)
     frame_correct = (np.abs(cent_diff - octave)[ref_voicing] < cent_tolerance)
     n_voiced = float(ref_voicing.sum())
@@ -619,12 +740,37 @@ def overall_accuracy(ref_voicing, ref_cent, est_voicing, est_cent,
        or ref_cent.size == 0 or est_cent.size == 0:
         return 0.
 
+    return _overall_accuracy(ref_voicing, est_voicing,
+                             np.abs(ref_cent - est_cent), cent_tolerance)
+
+
+def _overall_accuracy(ref_voicing, est_voicing, cent_diff, cent_tolerance):
+    """Compute the overall accuracy from validated voicing arrays and the
+    absolute difference between reference and estimated cents.
+
+    Parameters
+    ----------
+    ref_voicing : np.ndarray, dtype=bool
+        Reference boolean voicing array
+    est_voicing : np.ndarray, dtype=bool
+        Estimated boolean voicing array
+    cent_diff : np.ndarray
+        Absolute difference between the reference and estimated pitch
+        sequences, in cents
+    cent_tolerance : float
+        Maximum absolute deviation for a cent value to be considered correct
+
+    Returns
+    -------
+    overall_accuracy : float
+        Overall accuracy
+
+    """
     # True negatives = frames correctly estimates as unvoiced
     TN = ((ref_voicing == 0)*(est_voicing == 0)).sum()
 
-    cent_diff = np.abs(ref_cent - est_cent)
     frame_correct = (cent_diff[ref_voicing*est_voicing] < cent_tolerance)
-    accuracy = (frame_correct.sum() + TN)/float(ref_cent.shape[0])
+    accuracy = (frame_correct.sum() + TN)/float(cent_diff.shape[0])
 
     return accuracy
 
@@ -667,26 +813,30 @@ def evaluate(ref_time, ref_freq, est_time, est_freq, **kwargs):
      est_voicing, est_cent) = util.filter_kwargs(
          to_cent_voicing, ref_time, ref_freq, est_time, est_freq, **kwargs)
 
+    # Validate and compute the voicing masks and cent errors once,
+    # and share them across all metrics
+    validate_voicing(ref_voicing, est_voicing)
+    validate(ref_voicing, ref_cent, est_voicing, est_cent)
+    ref_voicing = ref_voicing.astype(bool)
+    est_voicing = est_voicing.astype(bool)
+    cent_diff = np.abs(ref_cent - est_cent)
+    cent_tolerance = kwargs.get('cent_tolerance', 50)
+
     # Compute metrics
     scores = collections.OrderedDict()
 
     (scores['Voicing Recall'],
-     scores['Voicing False Alarm']) = util.filter_kwargs(voicing_measures,
-                                                         ref_voicing,
-                                                         est_voicing, **kwargs)
-
-    scores['Raw Pitch Accuracy'] = util.filter_kwargs(raw_pitch_accuracy,
-                                                      ref_voicing, ref_cent,
-                                                      est_voicing, est_cent,
-                                                      **kwargs)
-
-    scores['Raw Chroma Accuracy'] = util.filter_kwargs(raw_chroma_accuracy,
-                                                       ref_voicing, ref_cent,
-                                                       est_voicing, est_cent,
-                                                       **kwargs)
-
-    scores['Overall Accuracy'] = util.filter_kwargs(overall_accuracy,
-                                                    ref_voicing, ref_cent,
-                                                    est_voicing, est_cent,
-                                                    **kwargs)
+     scores['Voicing False Alarm']) = _voicing_measures(ref_voicing,
+                                                        est_voicing)
+
+    scores['Raw Pitch Accuracy'] = _raw_pitch_accuracy(ref_voicing,
+                                                       cent_diff,
+                                                       cent_tolerance)
+
+    scores['Raw Chroma Accuracy'] = _raw_chroma_accuracy(ref_voicing,
+                                                         cent_diff,
+                                                         cent_tolerance)
+
+    scores['Overall Accuracy'] = _overall_accuracy(ref_voicing, est_voicing,
+                                                   cent_diff, cent_tolerance)
     return scores
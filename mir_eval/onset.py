@@ -21,11 +21,14 @@ Metrics
 * :func:`mir_eval.onset.f_measure`: Precision, Recall, and F-measure scores
   based on the number of esimated onsets which are sufficiently close to
   reference onsets.
+* :func:`mir_eval.onset.f_measure_sweep`: Precision, Recall, and F-measure
+  scores for a range of window sizes, computed in a single matching pass.
 '''
 
 import collections
 from . import util
 import warnings
+import numpy as np
 
 
 # The maximum allowable beat time
@@ -98,6 +101,62 @@ def f_measure(reference_onsets, estimated_onsets, window=.05):
     return util.f_measure(precision, recall), precision, recall
 
 
+def f_measure_sweep(reference_onsets, estimated_onsets, windows):
+    """Compute the F-measure of correct vs incorrectly predicted onsets for
+    each of several window sizes.
+
+    This produces the same scores as calling :func:`f_measure` once per
+    window, but the candidate onset pairings are only computed once and the
+    matching for each window is grown from the matching of the next smaller
+    window.
+
+    Examples
+    --------
+    >>> reference_onsets = mir_eval.io.load_events('reference.txt')
+    >>> estimated_onsets = mir_eval.io.load_events('estimated.txt')
+    >>> windows = np.linspace(.005, .1, 100)
+    >>> F, P, R = mir_eval.onset.f_measure_sweep(reference_onsets,
+    ...                                          estimated_onsets,
+    ...                                          windows)
+
+    Parameters
+    ----------
+    reference_onsets : np.ndarray
+        reference onset locations, in seconds
+    estimated_onsets : np.ndarray
+        estimated onset locations, in seconds
+    windows : np.ndarray
+        Window sizes, in seconds
+
+    Returns
+    -------
+    f_measure : np.ndarray
+        2*precision*recall/(precision + recall) for each window
+    precision : np.ndarray
+        (# true positives)/(# true positives + # false positives)
+        for each window
+    recall : np.ndarray
+        (# true positives)/(# true positives + # false negatives)
+        for each window
+
+    """
+    validate(reference_onsets, estimated_onsets)
+    windows = np.atleast_1d(np.asarray(windows, dtype=np.float64))
+    # If either list is empty, return 0s
+    if reference_onsets.size == 0 or estimated_onsets.size == 0:
+        return (np.zeros(windows.shape), np.zeros(windows.shape),
+                np.zeros(windows.shape))
+    # Compute the size of the best-case matching for every window at once
+    n_matches = util.match_events_sweep(reference_onsets, estimated_onsets,
+                                        windows)
+
+    precision = n_matches/float(len(estimated_onsets))
+    recall = n_matches/float(len(reference_onsets))
+    f_measure = np.array([util.f_measure(p, r)
+                          for p, r in zip(precision, recall)])
+    return f_measure, precision, recall
+
+
 def evaluate(reference_onsets, estimated_onsets, **kwargs):
     """Compute all metrics for the given reference and estimated annotations.
 
@@ -50,6 +50,13 @@ Metrics
   as normalization rather than the maximum entropy distribution
   [#rosenberg2007]_
 
+The frame-clustering metrics (:func:`mir_eval.segment.pairwise` through
+:func:`mir_eval.segment.vmeasure`) sample both annotations at a fixed
+``frame_size``.  Setting ``frame_size=None`` instead computes them exactly in
+continuous time, from the durations of overlap between reference and
+estimated segments; this is the limit of the sampled metrics as
+``frame_size`` goes to zero, and its cost does not depend on the duration of
+the track.
 
 References
 ----------
@@ -78,8 +85,8 @@ import warnings
 import numpy as np
 import scipy.stats
 import scipy.sparse
-import scipy.misc
 import scipy.special
+import six
 
 from . import util
 
@@ -199,6 +206,10 @@ def detection(reference_intervals, estimated_intervals,
     ...                                      est_intervals,
     ...                                      window=0.5,
     ...                                      trim=True)
+    >>> # With several windows at once
+    >>> P, R, F = mir_eval.segment.detection(ref_intervals,
+    ...                                      est_intervals,
+    ...                                      window=[0.5, 1, 3])
 
     Parameters
     ----------
@@ -210,9 +221,11 @@ def detection(reference_intervals, estimated_intervals,
         estimated segment intervals, in the format returned by
         :func:`mir_eval.io.load_intervals` or
         :func:`mir_eval.io.load_labeled_intervals`.
-    window : float > 0
+    window : float > 0 or list of float > 0
         size of the window of 'correctness' around ground-truth beats
-        (in seconds)
+        (in seconds).
+        If a list of windows is given, the scores for all of them are
+        computed at once, from a single set of candidate boundary matches.
         (Default value = 0.5)
     beta : float > 0
         weighting constant for F-measure.
@@ -224,13 +237,16 @@ def detection(reference_intervals, estimated_intervals,
 
     Returns
     -------
-    precision : float
+    precision : float or np.ndarray
         precision of estimated predictions
-    recall : float
+    recall : float or np.ndarray
         recall of reference reference boundaries
-    f_measure : float
+    f_measure : float or np.ndarray
         F-measure (weighted harmonic mean of ``precision`` and ``recall``)
 
+        If ``window`` is a list, each of these is an array with one entry
+        per window.
+
     """
 
     validate_boundary(reference_intervals, estimated_intervals, trim)
@@ -244,18 +260,26 @@ def detection(reference_intervals, estimated_intervals,
         reference_boundaries = reference_boundaries[1:-1]
         estimated_boundaries = estimated_boundaries[1:-1]
 
+    windows = np.atleast_1d(np.asarray(window, dtype=np.float64))
+
     # If we have no boundaries, we get no score.
     if len(reference_boundaries) == 0 or len(estimated_boundaries) == 0:
-        return 0.0, 0.0, 0.0
+        precision, recall, f_measure = np.zeros((3,) + windows.shape)
 
-    matching = util.match_events(reference_boundaries,
-                                 estimated_boundaries,
-                                 window)
+    else:
+        # Candidate matches are found once, at the largest window
+        n_matches = util.match_events_sweep(reference_boundaries,
+                                            estimated_boundaries,
+                                            windows)
 
-    precision = float(len(matching)) / len(estimated_boundaries)
-    recall = float(len(matching)) / len(reference_boundaries)
+        precision = n_matches / float(len(estimated_boundaries))
+        recall = n_matches / float(len(reference_boundaries))
 
-    f_measure = util.f_measure(precision, recall, beta=beta)
+        f_measure = np.array([util.f_measure(p, r, beta=beta)
+                              for p, r in zip(precision, recall)])
+
+    if np.ndim(window) == 0:
+        return float(precision[0]), float(recall[0]), float(f_measure[0])
 
     return precision, recall, f_measure
 
@@ -312,11 +336,10 @@ def deviation(reference_intervals, estimated_intervals, trim=False):
     if len(reference_boundaries) == 0 or len(estimated_boundaries) == 0:
         return np.nan, np.nan
 
-    dist = np.abs(np.subtract.outer(reference_boundaries,
-                                    estimated_boundaries))
-
-    estimated_to_reference = np.median(dist.min(axis=0))
-    reference_to_estimated = np.median(dist.min(axis=1))
+    estimated_to_reference = np.median(
+        util.nearest_distances(estimated_boundaries, reference_boundaries))
+    reference_to_estimated = np.median(
+        util.nearest_distances(reference_boundaries, estimated_boundaries))
 
     return reference_to_estimated, estimated_to_reference
 
@@ -359,8 +382,11 @@ def pairwise(reference_intervals, reference_labels,
     estimated_labels : list, shape=(m,)
         estimated segment labels, in the format returned by
         :func:`mir_eval.io.load_labeled_intervals`.
-    frame_size : float > 0
-        length (in seconds) of frames for clustering
+    frame_size : float > 0 or None
+        length (in seconds) of frames for clustering.
+        If ``None``, the metric is computed exactly in continuous time,
+        from the durations of overlap between reference and estimated
+        segments.
         (Default value = 0.1)
     beta : float > 0
         beta value for F-measure
@@ -384,32 +410,46 @@ def pairwise(reference_intervals, reference_labels,
     if reference_intervals.size == 0 or estimated_intervals.size == 0:
         return 0., 0., 0.
 
-    # Generate the cluster labels
-    y_ref = util.intervals_to_samples(reference_intervals,
-                                      reference_labels,
-                                      sample_size=frame_size)[-1]
+    # Generate the cluster labels and their contingency matrix
+    y_ref, y_est, contingency = _frame_contingency(reference_intervals,
+                                                   reference_labels,
+                                                   estimated_intervals,
+                                                   estimated_labels,
+                                                   frame_size)
 
-    y_ref = util.index_labels(y_ref)[0]
+    return _pairwise(contingency, beta=beta, continuous=frame_size is None)
 
-    # Map to index space
-    y_est = util.intervals_to_samples(estimated_intervals,
-                                      estimated_labels,
-                                      sample_size=frame_size)[-1]
 
-    y_est = util.index_labels(y_est)[0]
+def _pairwise(contingency, beta=1.0, continuous=False):
+    """Pair-wise frame clustering precision, recall and F-measure, computed
+    from the contingency matrix of the sampled labels.
 
-    # Build the reference label agreement matrix
-    agree_ref = np.equal.outer(y_ref, y_ref)
-    # Count the unique pairs
-    n_agree_ref = (agree_ref.sum() - len(y_ref)) / 2.0
+    Parameters
+    ----------
+    contingency : np.ndarray
+        Contingency matrix, as returned by :func:`_frame_contingency`
+    beta : float > 0
+        beta value for F-measure
+        (Default value = 1.0)
+    continuous : bool
+        If ``True``, ``contingency`` holds overlap durations rather than
+        frame counts.
+        (Default value = False)
 
-    # Repeat for estimate
-    agree_est = np.equal.outer(y_est, y_est)
-    n_agree_est = (agree_est.sum() - len(y_est)) / 2.0
+    Returns
+    -------
+    precision : float > 0
+        Precision of detecting whether frames belong in the same cluster
+    recall : float > 0
+        Recall of detecting whether frames belong in the same cluster
+    f : float > 0
+        F-measure of detecting whether frames belong in the same cluster
 
-    # Find where they agree
-    matches = np.logical_and(agree_ref, agree_est)
-    n_matches = (matches.sum() - len(y_ref)) / 2.0
+    """
+    # Count the unique pairs of frames which have the same reference label,
+    # the same estimated label, and both
+    n_agree_ref, n_agree_est, n_matches = _pair_counts(contingency,
+                                                       continuous=continuous)
 
     precision = n_matches / n_agree_est
     recall = n_matches / n_agree_ref
@@ -456,8 +496,11 @@ def rand_index(reference_intervals, reference_labels,
     estimated_labels : list, shape=(m,)
         estimated segment labels, in the format returned by
         :func:`mir_eval.io.load_labeled_intervals`.
-    frame_size : float > 0
-        length (in seconds) of frames for clustering
+    frame_size : float > 0 or None
+        length (in seconds) of frames for clustering.
+        If ``None``, the metric is computed exactly in continuous time,
+        from the durations of overlap between reference and estimated
+        segments.
         (Default value = 0.1)
     beta : float > 0
         beta value for F-measure
@@ -478,41 +521,151 @@ def rand_index(reference_intervals, reference_labels,
     if reference_intervals.size == 0 or estimated_intervals.size == 0:
         return 0., 0., 0.
 
-    # Generate the cluster labels
-    y_ref = util.intervals_to_samples(reference_intervals,
-                                      reference_labels,
-                                      sample_size=frame_size)[-1]
-
-    y_ref = util.index_labels(y_ref)[0]
+    # Generate the cluster labels and their contingency matrix
+    y_ref, y_est, contingency = _frame_contingency(reference_intervals,
+                                                   reference_labels,
+                                                   estimated_intervals,
+                                                   estimated_labels,
+                                                   frame_size)
 
-    # Map to index space
-    y_est = util.intervals_to_samples(estimated_intervals,
-                                      estimated_labels,
-                                      sample_size=frame_size)[-1]
+    return _rand_index(contingency, continuous=frame_size is None)
 
-    y_est = util.index_labels(y_est)[0]
 
-    # Build the reference label agreement matrix
-    agree_ref = np.equal.outer(y_ref, y_ref)
+def _rand_index(contingency, continuous=False):
+    """(Non-adjusted) Rand index, computed from the contingency matrix of the
+    sampled labels.
 
-    # Repeat for estimate
-    agree_est = np.equal.outer(y_est, y_est)
-
-    # Find where they agree
-    matches_pos = np.logical_and(agree_ref, agree_est)
+    Parameters
+    ----------
+    contingency : np.ndarray
+        Contingency matrix, as returned by :func:`_frame_contingency`
+    continuous : bool
+        If ``True``, ``contingency`` holds overlap durations rather than
+        frame counts.
+        (Default value = False)
 
-    # Find where they disagree
-    matches_neg = np.logical_and(~agree_ref, ~agree_est)
+    Returns
+    -------
+    rand_index : float > 0
+        Rand index
 
-    n_pairs = len(y_ref) * (len(y_ref) - 1) / 2.0
+    """
+    # Count the unique pairs of frames which have the same reference label,
+    # the same estimated label, and both
+    n_agree_ref, n_agree_est, n_matches_pos = _pair_counts(
+        contingency, continuous=continuous)
+
+    n_samples = contingency.sum()
+    if continuous:
+        n_pairs = n_samples * n_samples / 2.0
+    else:
+        n_pairs = n_samples * (n_samples - 1) / 2.0
 
-    n_matches_pos = (matches_pos.sum() - len(y_ref)) / 2.0
-    n_matches_neg = matches_neg.sum() / 2.0
+    # Pairs which disagree in both the reference and the estimate
+    n_matches_neg = n_pairs - n_agree_ref - n_agree_est + n_matches_pos
     rand = (n_matches_pos + n_matches_neg) / n_pairs
 
     return rand
 
 
+def _frame_contingency(reference_intervals, reference_labels,
+                       estimated_intervals, estimated_labels, frame_size):
+    """Samples the reference and estimated annotations on a common frame grid,
+    maps their labels to indices, and builds the contingency matrix.
+
+    If ``frame_size`` is None, the contingency matrix instead holds the total
+    duration of overlap between each reference and estimated label, as
+    computed by :func:`_interval_contingency`.
+
+    Parameters
+    ----------
+    reference_intervals : np.ndarray, shape=(n, 2)
+        reference segment intervals
+    reference_labels : list, shape=(n,)
+        reference segment labels
+    estimated_intervals : np.ndarray, shape=(m, 2)
+        estimated segment intervals
+    estimated_labels : list, shape=(m,)
+        estimated segment labels
+    frame_size : float > 0 or None
+        length (in seconds) of frames for clustering
+
+    Returns
+    -------
+    y_ref : np.ndarray or None
+        Reference label index of each frame
+    y_est : np.ndarray or None
+        Estimated label index of each frame
+    contingency : np.ndarray
+        Contingency matrix of ``y_ref`` and ``y_est``
+
+    """
+    if frame_size is None:
+        return None, None, _interval_contingency(reference_intervals,
+                                                 reference_labels,
+                                                 estimated_intervals,
+                                                 estimated_labels)
+
+    # Generate the cluster labels directly in index space
+    y_ref = util.intervals_to_sample_indices(reference_intervals,
+                                             reference_labels,
+                                             sample_size=frame_size)[1]
+
+    y_est = util.intervals_to_sample_indices(estimated_intervals,
+                                             estimated_labels,
+                                             sample_size=frame_size)[1]
+
+    return y_ref, y_est, _contingency_matrix(y_ref, y_est)
+
+
+def _interval_contingency(reference_intervals, reference_labels,
+                          estimated_intervals, estimated_labels):
+    """Computes the total duration of overlap between each pair of reference
+    and estimated labels.
+
+    Parameters
+    ----------
+    reference_intervals : np.ndarray, shape=(n, 2)
+        reference segment intervals
+    reference_labels : list, shape=(n,)
+        reference segment labels
+    estimated_intervals : np.ndarray, shape=(m, 2)
+        estimated segment intervals
+    estimated_labels : list, shape=(m,)
+        estimated segment labels
+
+    Returns
+    -------
+    contingency : np.ndarray
+        Overlap durations, shape=(#reference labels, #estimated labels)
+
+    """
+    reference_intervals, reference_labels = util.sort_labeled_intervals(
+        reference_intervals, reference_labels)
+    estimated_intervals, estimated_labels = util.sort_labeled_intervals(
+        estimated_intervals, estimated_labels)
+
+    # Validation only requires the spans to match approximately, so snap the
+    # estimated span onto the reference span before merging boundaries
+    t_min, t_max = reference_intervals[0, 0], reference_intervals[-1, 1]
+    estimated_intervals = np.clip(estimated_intervals, t_min, t_max)
+    estimated_intervals[0, 0] = t_min
+    estimated_intervals[-1, 1] = t_max
+
+    # Split the track at every reference and estimated boundary
+    intervals, reference_labels, estimated_labels = \
+        util.merge_labeled_intervals(reference_intervals, reference_labels,
+                                     estimated_intervals, estimated_labels)
+
+    y_ref, ref_index_to_label = util.index_labels(reference_labels)
+    y_est, est_index_to_label = util.index_labels(estimated_labels)
+    durations = intervals[:, 1] - intervals[:, 0]
+
+    return scipy.sparse.coo_matrix(
+        (durations, (y_ref, y_est)),
+        shape=(len(ref_index_to_label), len(est_index_to_label))).toarray()
+
+
 def _contingency_matrix(reference_indices, estimated_indices):
     """Computes the contingency matrix of a true labeling vs an estimated one.
 
@@ -543,7 +696,42 @@ def _contingency_matrix(reference_indices, estimated_indices):
                                    dtype=np.int).toarray()
 
 
-def _adjusted_rand_index(reference_indices, estimated_indices):
+def _pair_counts(contingency, continuous=False):
+    """Counts the pairs of samples which share a label, from the contingency
+    matrix of two labelings.
+
+    Parameters
+    ----------
+    contingency : np.ndarray
+        Contingency matrix, as returned by :func:`_frame_contingency`
+    continuous : bool
+        If ``True``, ``contingency`` holds overlap durations rather than
+        frame counts, and the measure of the set of pairs of time instants is
+        returned instead.
+        (Default value = False)
+
+    Returns
+    -------
+    n_agree_ref : float
+        Number of unique pairs with the same reference label
+    n_agree_est : float
+        Number of unique pairs with the same estimated label
+    n_agree_both : float
+        Number of unique pairs with the same reference and estimated labels
+
+    """
+    def n_choose_2(counts):
+        if continuous:
+            return (counts * counts).sum() / 2.0
+        return (counts * (counts - 1)).sum() / 2.0
+
+    return (n_choose_2(contingency.sum(axis=1)),
+            n_choose_2(contingency.sum(axis=0)),
+            n_choose_2(contingency))
+
+
+def _adjusted_rand_index(reference_indices, estimated_indices,
+                         contingency=None, continuous=False):
     """Compute the Rand index, adjusted for change.
 
     Parameters
@@ -552,6 +740,13 @@ def _adjusted_rand_index(reference_indices, estimated_indices):
         Array of reference indices
     estimated_indices : np.ndarray
         Array of estimated indices
+    contingency : np.ndarray
+        Pre-computed contingency matrix.  If None, one will be computed.
+        (Default value = None)
+    continuous : bool
+        If ``True``, ``contingency`` holds overlap durations rather than
+        frame counts.
+        (Default value = False)
 
     Returns
     -------
@@ -561,29 +756,33 @@ def _adjusted_rand_index(reference_indices, estimated_indices):
     .. note:: Based on sklearn.metrics.cluster.adjusted_rand_score
 
     """
-    n_samples = len(reference_indices)
-    ref_classes = np.unique(reference_indices)
-    est_classes = np.unique(estimated_indices)
+    if contingency is None:
+        contingency = _contingency_matrix(reference_indices,
+                                          estimated_indices)
+    n_ref_classes, n_est_classes = contingency.shape
     # Special limit cases: no clustering since the data is not split;
     # or trivial clustering where each document is assigned a unique cluster.
     # These are perfect matches hence return 1.0.
-    if (ref_classes.shape[0] == est_classes.shape[0] == 1 or
-        ref_classes.shape[0] == est_classes.shape[0] == 0 or
-        (ref_classes.shape[0] == est_classes.shape[0] ==
-         len(reference_indices))):
+    if (n_ref_classes == n_est_classes == 1 or
+            n_ref_classes == n_est_classes == 0 or
+            (not continuous and
+             n_ref_classes == n_est_classes == contingency.sum())):
         return 1.0
 
-    contingency = _contingency_matrix(reference_indices, estimated_indices)
-
-    # Compute the ARI using the contingency data
-    sum_comb_c = sum(scipy.misc.comb(n_c, 2, exact=1) for n_c in
-                     contingency.sum(axis=1))
-    sum_comb_k = sum(scipy.misc.comb(n_k, 2, exact=1) for n_k in
-                     contingency.sum(axis=0))
-
-    sum_comb = sum((scipy.misc.comb(n_ij, 2, exact=1) for n_ij in
-                    contingency.flatten()))
-    prod_comb = (sum_comb_c * sum_comb_k)/float(scipy.misc.comb(n_samples, 2))
+    # Compute the ARI using the contingency data.
+    sum_comb_c, sum_comb_k, sum_comb = _pair_counts(contingency,
+                                                    continuous=continuous)
+    if continuous:
+        n_samples = contingency.sum()
+        prod_comb = (sum_comb_c * sum_comb_k)/(n_samples * n_samples / 2.0)
+    else:
+        # Pair counts are converted to python ints so that their product is
+        # exact
+        n_samples = int(contingency.sum())
+        sum_comb_c, sum_comb_k, sum_comb = [
+            int(n_comb) for n_comb in (sum_comb_c, sum_comb_k, sum_comb)]
+        prod_comb = ((sum_comb_c * sum_comb_k) /
+                     (n_samples * (n_samples - 1) / 2.0))
     mean_comb = (sum_comb_k + sum_comb_c)/2.
     return ((sum_comb - prod_comb)/(mean_comb - prod_comb))
 
@@ -624,8 +823,11 @@ def ari(reference_intervals, reference_labels,
     estimated_labels : list, shape=(m,)
         estimated segment labels, in the format returned by
         :func:`mir_eval.io.load_labeled_intervals`.
-    frame_size : float > 0
-        length (in seconds) of frames for clustering
+    frame_size : float > 0 or None
+        length (in seconds) of frames for clustering.
+        If ``None``, the metric is computed exactly in continuous time,
+        from the durations of overlap between reference and estimated
+        segments.
         (Default value = 0.1)
 
     Returns
@@ -642,21 +844,15 @@ def ari(reference_intervals, reference_labels,
     if reference_intervals.size == 0 or estimated_intervals.size == 0:
         return 0., 0., 0.
 
-    # Generate the cluster labels
-    y_ref = util.intervals_to_samples(reference_intervals,
-                                      reference_labels,
-                                      sample_size=frame_size)[-1]
-
-    y_ref = util.index_labels(y_ref)[0]
-
-    # Map to index space
-    y_est = util.intervals_to_samples(estimated_intervals,
-                                      estimated_labels,
-                                      sample_size=frame_size)[-1]
+    # Generate the cluster labels and their contingency matrix
+    y_ref, y_est, contingency = _frame_contingency(reference_intervals,
+                                                   reference_labels,
+                                                   estimated_intervals,
+                                                   estimated_labels,
+                                                   frame_size)
 
-    y_est = util.index_labels(y_est)[0]
-
-    return _adjusted_rand_index(y_ref, y_est)
+    return _adjusted_rand_index(y_ref, y_est, contingency=contingency,
+                                continuous=frame_size is None)
 
 
 def _mutual_info_score(reference_indices, estimated_indices, contingency=None):
@@ -682,7 +878,8 @@ def _mutual_info_score(reference_indices, estimated_indices, contingency=None):
     """
     if contingency is None:
         contingency = _contingency_matrix(reference_indices,
-                                          estimated_indices).astype(float)
+                                          estimated_indices)
+    contingency = contingency.astype(float)
     contingency_sum = np.sum(contingency)
     pi = np.sum(contingency, axis=1)
     pj = np.sum(contingency, axis=0)
@@ -719,7 +916,27 @@ def _entropy(labels):
     if len(labels) == 0:
         return 1.0
     label_idx = np.unique(labels, return_inverse=True)[1]
-    pi = np.bincount(label_idx).astype(np.float)
+    return _entropy_from_counts(np.bincount(label_idx))
+
+
+def _entropy_from_counts(counts):
+    """Calculates the entropy for a labeling, given the number of occurrences
+    of each label.
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        Number of samples with each label.
+
+    Returns
+    -------
+    entropy : float
+        Entropy of the labeling.
+
+    """
+    if np.sum(counts) == 0:
+        return 1.0
+    pi = np.asarray(counts).astype(np.float)
     pi = pi[pi > 0]
     pi_sum = np.sum(pi)
     # log(a / b) should be calculated as log(a) - log(b) for
@@ -727,7 +944,8 @@ def _entropy(labels):
     return -np.sum((pi / pi_sum) * (np.log(pi) - np.log(pi_sum)))
 
 
-def _adjusted_mutual_info_score(reference_indices, estimated_indices):
+def _adjusted_mutual_info_score(reference_indices, estimated_indices,
+                                contingency=None, continuous=False):
     """Compute the mutual information between two sequence labelings, adjusted for
     chance.
 
@@ -739,6 +957,16 @@ def _adjusted_mutual_info_score(reference_indices, estimated_indices):
     estimated_indices : np.ndarray
         Array of estimated indices
 
+    contingency : np.ndarray
+        Pre-computed contingency matrix.  If None, one will be computed.
+        (Default value = None)
+
+    continuous : bool
+        If ``True``, ``contingency`` holds overlap durations rather than
+        frame counts.  The expected mutual information vanishes as the number
+        of samples grows, so in this case it is taken to be 0.
+        (Default value = False)
+
     Returns
     -------
     ami : float <= 1.0
@@ -748,25 +976,57 @@ def _adjusted_mutual_info_score(reference_indices, estimated_indices):
         and sklearn.metrics.cluster.expected_mutual_info_score
 
     """
-    n_samples = len(reference_indices)
-    ref_classes = np.unique(reference_indices)
-    est_classes = np.unique(estimated_indices)
+    if contingency is None:
+        contingency = _contingency_matrix(reference_indices,
+                                          estimated_indices)
+    n_samples = contingency.sum()
+    n_ref_classes, n_est_classes = contingency.shape
     # Special limit cases: no clustering since the data is not split.
     # This is a perfect match hence return 1.0.
-    if (ref_classes.shape[0] == est_classes.shape[0] == 1 or
-            ref_classes.shape[0] == est_classes.shape[0] == 0):
+    if (n_ref_classes == n_est_classes == 1 or
+            n_ref_classes == n_est_classes == 0):
         return 1.0
-    contingency = _contingency_matrix(reference_indices,
-                                      estimated_indices).astype(float)
+    contingency = contingency.astype(float)
     # Calculate the MI for the two clusterings
     mi = _mutual_info_score(reference_indices, estimated_indices,
                             contingency=contingency)
-    # The following code is based on
-    # sklearn.metrics.cluster.expected_mutual_information
+    # Calculate the expected value for the mutual information
+    if continuous:
+        emi = 0.
+    else:
+        emi = _expected_mutual_info_score(contingency, n_samples)
+    # Calculate entropy for each labeling
+    h_true = _entropy_from_counts(contingency.sum(axis=1))
+    h_pred = _entropy_from_counts(contingency.sum(axis=0))
+    ami = (mi - emi) / (max(h_true, h_pred) - emi)
+    return ami
+
+
+def _expected_mutual_info_score(contingency, n_samples):
+    """Compute the expected mutual information of two labelings with the
+    marginals of a given contingency matrix, under the hypergeometric model
+    of randomness.
+
+    Parameters
+    ----------
+    contingency : np.ndarray
+        Contingency matrix, shape=(#reference indices, #estimated indices)
+    n_samples : int
+        Number of samples (the sum of ``contingency``)
+
+    Returns
+    -------
+    emi : float
+        Expected mutual information
+
+    .. note:: Based on sklearn.metrics.cluster.expected_mutual_information
+
+    """
+    n_samples = int(n_samples)
     R, C = contingency.shape
     N = float(n_samples)
-    a = np.sum(contingency, axis=1).astype(np.int32)
-    b = np.sum(contingency, axis=0).astype(np.int32)
+    a = np.sum(contingency, axis=1).astype(np.int64)
+    b = np.sum(contingency, axis=0).astype(np.int64)
     # There are three major terms to the EMI equation, which are multiplied to
     # and then summed over varying nij values.
     # While nijs[0] will never be used, having it simplifies the indexing.
@@ -781,38 +1041,41 @@ def _adjusted_mutual_info_score(reference_indices, estimated_indices):
     # term2 uses N * nij
     log_Nnij = np.log(N * nijs)
     # term3 is large, and involved many factorials. Calculate these in log
-    # space to stop overflows.
-    gln_a = scipy.special.gammaln(a + 1)
-    gln_b = scipy.special.gammaln(b + 1)
-    gln_Na = scipy.special.gammaln(N - a + 1)
-    gln_Nb = scipy.special.gammaln(N - b + 1)
-    gln_N = scipy.special.gammaln(N + 1)
+    # space to stop overflows.  All of the factorials are of integers in
+    # [0, N], so look them up in a table of log(k!)
+    gln_factorial = scipy.special.gammaln(np.arange(n_samples + 1) + 1.)
+    gln_a = gln_factorial[a]
+    gln_b = gln_factorial[b]
+    gln_Na = gln_factorial[n_samples - a]
+    gln_Nb = gln_factorial[n_samples - b]
+    gln_N = gln_factorial[n_samples]
     gln_nij = scipy.special.gammaln(nijs + 1)
     # start and end values for nij terms for each summation.
-    start = np.array([[v - N + w for w in b] for v in a], dtype='int')
-    start = np.maximum(start, 1)
-    end = np.minimum(np.resize(a, (C, R)).T, np.resize(b, (R, C))) + 1
+    start = np.maximum(np.add.outer(a, b) - n_samples, 1)
+    end = np.minimum.outer(a, b) + 1
+    n_terms = np.maximum(end - start, 0)
     # emi itself is a summation over the various values.
     emi = 0
     for i in range(R):
-        for j in range(C):
-            for nij in range(start[i, j], end[i, j]):
-                term2 = log_Nnij[nij] - log_ab_outer[i, j]
-                # Numerators are positive, denominators are negative.
-                gln = (gln_a[i] + gln_b[j] + gln_Na[i] + gln_Nb[j] -
-                       gln_N - gln_nij[nij] -
-                       scipy.special.gammaln(a[i] - nij + 1) -
-                       scipy.special.gammaln(b[j] - nij + 1) -
-                       scipy.special.gammaln(N - a[i] - b[j] + nij + 1))
-                term3 = np.exp(gln)
-                emi += (term1[nij] * term2 * term3)
-    # Calculate entropy for each labeling
-    h_true, h_pred = _entropy(reference_indices), _entropy(estimated_indices)
-    ami = (mi - emi) / (max(h_true, h_pred) - emi)
-    return ami
-
-
-def _normalized_mutual_info_score(reference_indices, estimated_indices):
+        # Flatten all (j, nij) terms of the summation for this row
+        j = np.repeat(np.arange(C), n_terms[i])
+        offsets = np.cumsum(n_terms[i]) - n_terms[i]
+        nij = (np.arange(n_terms[i].sum()) +
+               np.repeat(start[i] - offsets, n_terms[i]))
+        term2 = log_Nnij[nij] - log_ab_outer[i, j]
+        # Numerators are positive, denominators are negative.
+        gln = (gln_a[i] + gln_b[j] + gln_Na[i] + gln_Nb[j] -
+               gln_N - gln_nij[nij] -
+               gln_factorial[a[i] - nij] -
+               gln_factorial[b[j] - nij] -
+               gln_factorial[n_samples - a[i] - b[j] + nij])
+        term3 = np.exp(gln)
+        emi += np.sum(term1[nij] * term2 * term3)
+    return emi
+
+
+def _normalized_mutual_info_score(reference_indices, estimated_indices,
+                                  contingency=None):
     """Compute the mutual information between two sequence labelings, adjusted for
     chance.
 
@@ -824,6 +1087,10 @@ def _normalized_mutual_info_score(reference_indices, estimated_indices):
     estimated_indices : np.ndarray
         Array of estimated indices
 
+    contingency : np.ndarray
+        Pre-computed contingency matrix.  If None, one will be computed.
+        (Default value = None)
+
     Returns
     -------
     nmi : float <= 1.0
@@ -832,22 +1099,22 @@ def _normalized_mutual_info_score(reference_indices, estimated_indices):
     .. note:: Based on sklearn.metrics.cluster.normalized_mutual_info_score
 
     """
-    ref_classes = np.unique(reference_indices)
-    est_classes = np.unique(estimated_indices)
+    if contingency is None:
+        contingency = _contingency_matrix(reference_indices,
+                                          estimated_indices)
+    n_ref_classes, n_est_classes = contingency.shape
     # Special limit cases: no clustering since the data is not split.
     # This is a perfect match hence return 1.0.
-    if (ref_classes.shape[0] == est_classes.shape[0] == 1 or
-            ref_classes.shape[0] == est_classes.shape[0] == 0):
+    if (n_ref_classes == n_est_classes == 1 or
+            n_ref_classes == n_est_classes == 0):
         return 1.0
-    contingency = _contingency_matrix(reference_indices,
-                                      estimated_indices).astype(float)
     contingency = np.array(contingency, dtype='float')
     # Calculate the MI for the two clusterings
     mi = _mutual_info_score(reference_indices, estimated_indices,
                             contingency=contingency)
-    # Calculate the expected value for the mutual information
     # Calculate entropy for each labeling
-    h_true, h_pred = _entropy(reference_indices), _entropy(estimated_indices)
+    h_true = _entropy_from_counts(contingency.sum(axis=1))
+    h_pred = _entropy_from_counts(contingency.sum(axis=0))
     nmi = mi / max(np.sqrt(h_true * h_pred), 1e-10)
     return nmi
 
@@ -890,8 +1157,11 @@ def mutual_information(reference_intervals, reference_labels,
     estimated_labels : list, shape=(m,)
         estimated segment labels, in the format returned by
         :func:`mir_eval.io.load_labeled_intervals`.
-    frame_size : float > 0
-        length (in seconds) of frames for clustering
+    frame_size : float > 0 or None
+        length (in seconds) of frames for clustering.
+        If ``None``, the metric is computed exactly in continuous time,
+        from the durations of overlap between reference and estimated
+        segments.
         (Default value = 0.1)
 
     Returns
@@ -912,28 +1182,23 @@ def mutual_information(reference_intervals, reference_labels,
     if reference_intervals.size == 0 or estimated_intervals.size == 0:
         return 0., 0., 0.
 
-    # Generate the cluster labels
-    y_ref = util.intervals_to_samples(reference_intervals,
-                                      reference_labels,
-                                      sample_size=frame_size)[-1]
-
-    y_ref = util.index_labels(y_ref)[0]
-
-    # Map to index space
-    y_est = util.intervals_to_samples(estimated_intervals,
-                                      estimated_labels,
-                                      sample_size=frame_size)[-1]
-
-    y_est = util.index_labels(y_est)[0]
+    # Generate the cluster labels and their contingency matrix
+    y_ref, y_est, contingency = _frame_contingency(reference_intervals,
+                                                   reference_labels,
+                                                   estimated_intervals,
+                                                   estimated_labels,
+                                                   frame_size)
 
     # Mutual information
-    mutual_info = _mutual_info_score(y_ref, y_est)
+    mutual_info = _mutual_info_score(y_ref, y_est, contingency=contingency)
 
     # Adjusted mutual information
-    adj_mutual_info = _adjusted_mutual_info_score(y_ref, y_est)
+    adj_mutual_info = _adjusted_mutual_info_score(
+        y_ref, y_est, contingency=contingency, continuous=frame_size is None)
 
     # Normalized mutual information
-    norm_mutual_info = _normalized_mutual_info_score(y_ref, y_est)
+    norm_mutual_info = _normalized_mutual_info_score(y_ref, y_est,
+                                                     contingency=contingency)
 
     return mutual_info, adj_mutual_info, norm_mutual_info
 
@@ -978,8 +1243,11 @@ def nce(reference_intervals, reference_labels, estimated_intervals,
     estimated_labels : list, shape=(m,)
         estimated segment labels, in the format returned by
         :func:`mir_eval.io.load_labeled_intervals`.
-    frame_size : float > 0
-        length (in seconds) of frames for clustering
+    frame_size : float > 0 or None
+        length (in seconds) of frames for clustering.
+        If ``None``, the metric is computed exactly in continuous time,
+        from the durations of overlap between reference and estimated
+        segments.
         (Default value = 0.1)
     beta : float > 0
         beta for F-measure
@@ -1023,25 +1291,45 @@ def nce(reference_intervals, reference_labels, estimated_intervals,
     if reference_intervals.size == 0 or estimated_intervals.size == 0:
         return 0., 0., 0.
 
-    # Generate the cluster labels
-    y_ref = util.intervals_to_samples(reference_intervals,
-                                      reference_labels,
-                                      sample_size=frame_size)[-1]
+    # Generate the cluster labels and their contingency matrix
+    y_ref, y_est, contingency = _frame_contingency(reference_intervals,
+                                                   reference_labels,
+                                                   estimated_intervals,
+                                                   estimated_labels,
+                                                   frame_size)
 
-    y_ref = util.index_labels(y_ref)[0]
+    return _nce(contingency, beta=beta, marginal=marginal)
 
-    # Map to index space
-    y_est = util.intervals_to_samples(estimated_intervals,
-                                      estimated_labels,
-                                      sample_size=frame_size)[-1]
 
-    y_est = util.index_labels(y_est)[0]
+def _nce(contingency, beta=1.0, marginal=False):
+    """Normalized conditional entropy scores, computed from the contingency
+    matrix of the sampled labels.
+
+    Parameters
+    ----------
+    contingency : np.ndarray
+        Contingency matrix, as returned by :func:`_frame_contingency`
+    beta : float > 0
+        beta for F-measure
+        (Default value = 1.0)
+    marginal : bool
+        If `False`, normalize conditional entropy by uniform entropy.
+        If `True`, normalize conditional entropy by the marginal entropy.
+        (Default value = False)
 
-    # Make the contingency table: shape = (n_ref, n_est)
-    contingency = _contingency_matrix(y_ref, y_est).astype(float)
+    Returns
+    -------
+    S_over
+        Over-clustering score
+    S_under
+        Under-clustering score
+    S_F
+        F-measure for (S_over, S_under)
 
+    """
     # Normalize by the number of frames
-    contingency = contingency / len(y_ref)
+    contingency = contingency.astype(float)
+    contingency = contingency / contingency.sum()
 
     # Compute the marginals
     p_est = contingency.sum(axis=0)
@@ -1117,8 +1405,11 @@ def vmeasure(reference_intervals, reference_labels, estimated_intervals,
     estimated_labels : list, shape=(m,)
         estimated segment labels, in the format returned by
         :func:`mir_eval.io.load_labeled_intervals`.
-    frame_size : float > 0
-        length (in seconds) of frames for clustering
+    frame_size : float > 0 or None
+        length (in seconds) of frames for clustering.
+        If ``None``, the metric is computed exactly in continuous time,
+        from the durations of overlap between reference and estimated
+        segments.
         (Default value = 0.1)
     beta : float > 0
         beta for F-measure
@@ -1149,6 +1440,34 @@ def vmeasure(reference_intervals, reference_labels, estimated_intervals,
                marginal=True)
 
 
+def _metric_kwargs(function, kwargs):
+    """Resolve the keyword arguments of a metric function from ``kwargs``,
+    falling back on the defaults in the function's signature.
+
+    Parameters
+    ----------
+    function : callable
+        The metric function whose keyword arguments are resolved.
+    kwargs : dict
+        Keyword arguments, as passed to :func:`mir_eval.segment.evaluate`.
+
+    Returns
+    -------
+    resolved : dict
+        Maps each keyword argument of ``function`` to its value in
+        ``kwargs``, or to its default if absent.
+
+    """
+    func_code = six.get_function_code(function)
+    names = func_code.co_varnames[:func_code.co_argcount]
+    defaults = six.get_function_defaults(function)
+    resolved = dict(zip(names[len(names) - len(defaults):], defaults))
+    for name in resolved:
+        if name in kwargs:
+            resolved[name] = kwargs[name]
+    return resolved
+
+
 def evaluate(ref_intervals, ref_labels, est_intervals, est_labels, **kwargs):
     """Compute all metrics for the given reference and estimated annotations.
 
@@ -1199,53 +1518,59 @@ def evaluate(ref_intervals, ref_labels, est_intervals, est_labels, **kwargs):
     scores = collections.OrderedDict()
 
     # Boundary detection
-    # Force these values for window
-    kwargs['window'] = .5
-    scores['Precision@0.5'], scores['Recall@0.5'], scores['F-measure@0.5'] = \
-        util.filter_kwargs(detection, ref_intervals, est_intervals, **kwargs)
-
-    kwargs['window'] = 3.0
-    scores['Precision@3.0'], scores['Recall@3.0'], scores['F-measure@3.0'] = \
+    # Force these values for window, and compute both in one pass
+    kwargs['window'] = [.5, 3.0]
+    precision, recall, f_measure = \
         util.filter_kwargs(detection, ref_intervals, est_intervals, **kwargs)
+    for n, window in enumerate(['0.5', '3.0']):
+        scores['Precision@' + window] = float(precision[n])
+        scores['Recall@' + window] = float(recall[n])
+        scores['F-measure@' + window] = float(f_measure[n])
 
     # Boundary deviation
     scores['Ref-to-est deviation'], scores['Est-to-ref deviation'] = \
         util.filter_kwargs(deviation, ref_intervals, est_intervals, **kwargs)
 
+    # The frame clustering metrics all share one sampling of the annotations
+    # and one contingency matrix
+    validate_structure(ref_intervals, ref_labels, est_intervals, est_labels)
+    pairwise_kwargs = _metric_kwargs(pairwise, kwargs)
+    nce_kwargs = _metric_kwargs(nce, kwargs)
+    frame_size = pairwise_kwargs['frame_size']
+    y_ref, y_est, contingency = _frame_contingency(ref_intervals, ref_labels,
+                                                   est_intervals, est_labels,
+                                                   frame_size)
+
+    continuous = frame_size is None
+
     # Pairwise clustering
     (scores['Pairwise Precision'],
      scores['Pairwise Recall'],
-     scores['Pairwise F-measure']) = util.filter_kwargs(pairwise,
-                                                        ref_intervals,
-                                                        ref_labels,
-                                                        est_intervals,
-                                                        est_labels, **kwargs)
+     scores['Pairwise F-measure']) = _pairwise(
+        contingency, beta=pairwise_kwargs['beta'], continuous=continuous)
 
     # Rand index
-    scores['Rand Index'] = util.filter_kwargs(rand_index, ref_intervals,
-                                              ref_labels, est_intervals,
-                                              est_labels, **kwargs)
+    scores['Rand Index'] = _rand_index(contingency, continuous=continuous)
     # Adjusted rand index
-    scores['Adjusted Rand Index'] = util.filter_kwargs(ari, ref_intervals,
-                                                       ref_labels,
-                                                       est_intervals,
-                                                       est_labels, **kwargs)
+    scores['Adjusted Rand Index'] = _adjusted_rand_index(
+        y_ref, y_est, contingency=contingency, continuous=continuous)
 
     # Mutual information metrics
-    (scores['Mutual Information'],
-     scores['Adjusted Mutual Information'],
-     scores['Normalized Mutual Information']) = \
-        util.filter_kwargs(mutual_information, ref_intervals, ref_labels,
-                           est_intervals, est_labels, **kwargs)
+    scores['Mutual Information'] = _mutual_info_score(
+        y_ref, y_est, contingency=contingency)
+    scores['Adjusted Mutual Information'] = _adjusted_mutual_info_score(
+        y_ref, y_est, contingency=contingency, continuous=continuous)
+    scores['Normalized Mutual Information'] = _normalized_mutual_info_score(
+        y_ref, y_est, contingency=contingency)
 
     # Conditional entropy metrics
     scores['NCE Over'], scores['NCE Under'], scores['NCE F-measure'] = \
-        util.filter_kwargs(nce, ref_intervals, ref_labels, est_intervals,
-                           est_labels, **kwargs)
+        _nce(contingency, beta=nce_kwargs['beta'],
+             marginal=nce_kwargs['marginal'])
 
     # V-measure metrics
     scores['V Precision'], scores['V Recall'], scores['V-measure'] = \
-        util.filter_kwargs(vmeasure, ref_intervals, ref_labels, est_intervals,
-                           est_labels, **kwargs)
+        _nce(contingency, beta=_metric_kwargs(vmeasure, kwargs)['beta'],
+             marginal=True)
 
     return scores
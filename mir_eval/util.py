@@ -10,7 +10,7 @@ import six
 import numpy as np
 
 
-def index_labels(labels, case_sensitive=False):
+def index_labels(labels, case_sensitive=False, vocabulary=None):
     """Convert a list of string identifiers into numerical indices.
 
     Parameters
@@ -23,6 +23,14 @@ def index_labels(labels, case_sensitive=False):
         Set to True to enable case-sensitive label indexing
         (Default value = False)
 
+    vocabulary : dict or None
+        An ``index_to_label`` mapping, as returned by a previous call with
+        the same ``case_sensitive`` setting, against which to index
+        ``labels``.  This allows labels from many annotations to share one
+        set of indices.  If None, the mapping is built from the sorted
+        unique values of ``labels``.
+        (Default value = None)
+
     Returns
     -------
     indices : list, shape=(n,)
@@ -31,22 +39,44 @@ def index_labels(labels, case_sensitive=False):
         Mapping to convert numerical indices back to labels.
         ``labels[i] == index_to_label[indices[i]]``
 
+    Raises
+    ------
+    ValueError
+        If ``vocabulary`` is provided and does not contain every label.
+
     """
 
-    label_to_index = {}
-    index_to_label = {}
+    # Hashing native objects is much faster than sorting a numpy string array
+    if isinstance(labels, np.ndarray):
+        labels = labels.tolist()
+
+    # Find the distinct raw labels first, so that each one is only
+    # lower-cased and looked up once
+    raw_labels = list(set(labels))
+
+    # Unless we're case-sensitive, index the lower-cased labels
+    if case_sensitive:
+        keys = raw_labels
+    else:
+        keys = [str(s).lower() for s in raw_labels]
+
+    # Build the unique label mapping, unless one was provided
+    if vocabulary is None:
+        index_to_label = dict(enumerate(sorted(set(keys))))
+    else:
+        index_to_label = vocabulary
 
-    # If we're not case-sensitive,
-    if not case_sensitive:
-        labels = [str(s).lower() for s in labels]
+    label_to_index = {s: index for index, s in six.iteritems(index_to_label)}
 
-    # First, build the unique label mapping
-    for index, s in enumerate(sorted(set(labels))):
-        label_to_index[s] = index
-        index_to_label[index] = s
+    try:
+        raw_indices = [label_to_index[s] for s in keys]
+    except KeyError as exc:
+        raise ValueError('Label {!r} is not in the vocabulary'.format(
+            exc.args[0]))
 
     # Remap the labels to indices
-    indices = [label_to_index[s] for s in labels]
+    raw_to_index = dict(zip(raw_labels, raw_indices))
+    indices = [raw_to_index[s] for s in labels]
 
     # Return the converted labels, and the inverse mapping
     return indices, index_to_label
@@ -116,16 +146,98 @@ def intervals_to_samples(intervals, labels, offset=0, sample_size=0.1,
 
     """
 
-    # Round intervals to the sample size
-    num_samples = int(np.floor(intervals.max() / sample_size))
-    sample_indices = np.arange(num_samples, dtype=np.float32)
-    sample_times = (sample_indices*sample_size + offset).tolist()
+    sample_times = _sample_times(intervals, offset, sample_size).tolist()
     sampled_labels = interpolate_intervals(
         intervals, labels, sample_times, fill_value)
 
     return sample_times, sampled_labels
 
 
+def intervals_to_sample_indices(intervals, labels, offset=0, sample_size=0.1,
+                                case_sensitive=False):
+    """Convert an array of labeled time intervals to integer label indices
+    on a regular sample grid.
+
+    This is equivalent to calling :func:`intervals_to_samples` followed by
+    :func:`index_labels` on the sampled labels, but labels are only indexed
+    once per interval, and samples are never materialized as label objects.
+
+    Parameters
+    ----------
+    intervals : np.ndarray, shape=(n, 2)
+        An array of time intervals, as returned by
+        :func:`mir_eval.io.load_intervals()` or
+        :func:`mir_eval.io.load_labeled_intervals()`.
+        The ``i`` th interval spans time ``intervals[i, 0]`` to
+        ``intervals[i, 1]``.
+
+    labels : list, shape=(n,)
+        The annotation for each interval
+
+    offset : float > 0
+        Phase offset of the sampled time grid (in seconds)
+        (Default value = 0)
+
+    sample_size : float > 0
+        duration of each sample to be generated (in seconds)
+        (Default value = 0.1)
+
+    case_sensitive : bool
+        Set to True to enable case-sensitive label indexing
+        (Default value = False)
+
+    Returns
+    -------
+    sample_times : np.ndarray, shape=(m,)
+        Sample times
+
+    sample_indices : np.ndarray, shape=(m,), dtype=np.int32
+        Label index of each sample, or ``-1`` for samples which do not
+        lie within any interval
+
+    index_to_label : dict
+        Mapping to convert label indices back to labels, as returned by
+        :func:`index_labels`
+
+    Notes
+    -----
+        Intervals will be rounded down to the nearest multiple
+        of ``sample_size``.
+
+    """
+    sample_times = _sample_times(intervals, offset, sample_size)
+    indices, index_to_label = index_labels(labels,
+                                           case_sensitive=case_sensitive)
+    sample_indices = interpolate_interval_indices(intervals, indices,
+                                                  sample_times)
+
+    return sample_times, sample_indices, index_to_label
+
+
+def _sample_times(intervals, offset, sample_size):
+    """Build the regular sample grid used by :func:`intervals_to_samples`.
+
+    Parameters
+    ----------
+    intervals : np.ndarray, shape=(n, 2)
+        An array of time intervals
+    offset : float > 0
+        Phase offset of the sampled time grid (in seconds)
+    sample_size : float > 0
+        duration of each sample (in seconds)
+
+    Returns
+    -------
+    sample_times : np.ndarray, shape=(m,)
+        Sample times
+
+    """
+    # Round intervals to the sample size
+    num_samples = int(np.floor(intervals.max() / sample_size))
+    sample_indices = np.arange(num_samples, dtype=np.float32)
+    return sample_indices*sample_size + offset
+
+
 def interpolate_intervals(intervals, labels, time_points, fill_value=None):
     """Assign labels to a set of points in time given a set of intervals.
 
@@ -163,21 +275,87 @@ def interpolate_intervals(intervals, labels, time_points, fill_value=None):
         If `time_points` is not in non-decreasing order.
     """
 
+    aligned_indices = interpolate_interval_indices(
+        intervals, np.arange(len(labels)), time_points)
+
+    return [labels[index] if index >= 0 else fill_value
+            for index in aligned_indices]
+
+
+def interpolate_interval_indices(intervals, indices, time_points,
+                                 fill_index=-1):
+    """Assign integer label indices to a set of points in time given a set
+    of intervals.
+
+    Time points that do not lie within an interval are mapped to
+    `fill_index`.  Where several intervals contain a time point, the last
+    of them in ``intervals`` is used, as in :func:`interpolate_intervals`.
+
+    Parameters
+    ----------
+    intervals : np.ndarray, shape=(n, 2)
+        An array of time intervals, as returned by
+        :func:`mir_eval.io.load_intervals()`.
+        The ``i`` th interval spans time ``intervals[i, 0]`` to
+        ``intervals[i, 1]``.
+
+        Intervals are assumed to be disjoint.
+
+    indices : array_like of int, shape=(n,)
+        The label index for each interval, e.g., as returned by
+        :func:`index_labels`
+
+    time_points : array_like, shape=(m,)
+        Points in time to assign label indices.  These must be in
+        non-decreasing order.
+
+    fill_index : int
+        Index to use for out-of-range time points.
+        (Default value = -1)
+
+    Returns
+    -------
+    aligned_indices : np.ndarray, shape=(m,), dtype=np.int32
+        Label indices corresponding to the given time points.
+
+    Raises
+    ------
+    ValueError
+        If `time_points` is not in non-decreasing order.
+
+    """
+
     # Verify that time_points is sorted
     time_points = np.asarray(time_points)
 
     if np.any(time_points[1:] < time_points[:-1]):
         raise ValueError('time_points must be in non-decreasing order')
 
-    aligned_labels = [fill_value] * len(time_points)
+    aligned_indices = np.empty(len(time_points), dtype=np.int32)
+    aligned_indices.fill(fill_index)
+    if len(intervals) == 0:
+        return aligned_indices
 
-    starts = np.searchsorted(time_points, intervals[:, 0], side='left')
-    ends = np.searchsorted(time_points, intervals[:, 1], side='right')
+    indices = np.asarray(indices, dtype=np.int32)
+    starts, ends = intervals[:, 0], intervals[:, 1]
 
-    for (start, end, lab) in zip(starts, ends, labels):
-        aligned_labels[start:end] = [lab] * (end - start)
+    if np.all(ends >= starts) and np.all(starts[1:] >= ends[:-1]):
+        # Ordered, non-overlapping intervals: the last one listed which
+        # contains a time point is the latest to start at or before it
+        positions = np.searchsorted(starts, time_points, side='right') - 1
+        candidates = np.maximum(positions, 0)
 
-    return aligned_labels
+        # Keep only the time points which fall within that interval
+        inside = (positions >= 0) & (time_points <= ends[candidates])
+        aligned_indices[inside] = indices[candidates[inside]]
+    else:
+        # Otherwise, later intervals overwrite earlier ones
+        first = np.searchsorted(time_points, starts, side='left')
+        last = np.searchsorted(time_points, ends, side='right')
+        for index, start, end in zip(indices, first, last):
+            aligned_indices[start:end] = index
+
+    return aligned_indices
 
 
 def sort_labeled_intervals(intervals, labels=None):
@@ -533,18 +711,41 @@ def merge_labeled_intervals(x_intervals, x_labels, y_intervals, y_labels):
     output_intervals = np.array(
         [time_boundaries[:-1], time_boundaries[1:]]).T
 
-    x_labels_out, y_labels_out = [], []
-    x_label_range = np.arange(len(x_labels))
-    y_label_range = np.arange(len(y_labels))
-    for t0, _ in output_intervals:
-        x_idx = x_label_range[(t0 >= x_intervals[:, 0])]
-        x_labels_out.append(x_labels[x_idx[-1]])
-        y_idx = y_label_range[(t0 >= y_intervals[:, 0])]
-        y_labels_out.append(y_labels[y_idx[-1]])
+    # Each output interval takes the label of the last input interval
+    # which starts at or before it
+    x_idx = _last_start_index(x_intervals, output_intervals[:, 0])
+    y_idx = _last_start_index(y_intervals, output_intervals[:, 0])
+    x_labels_out = [x_labels[i] for i in x_idx]
+    y_labels_out = [y_labels[i] for i in y_idx]
     return output_intervals, x_labels_out, y_labels_out
 
 
-def _bipartite_match(graph):
+def _last_start_index(intervals, times):
+    """For each time, find the largest index ``i`` such that
+    ``intervals[i, 0] <= time``.
+
+    Parameters
+    ----------
+    intervals : np.ndarray, shape=(n, 2)
+        Array of interval times, in any order
+    times : np.ndarray, shape=(m,)
+        Query times, each no earlier than the earliest interval start
+
+    Returns
+    -------
+    indices : np.ndarray, shape=(m,), dtype=int
+        Index of the last interval starting at or before each time
+
+    """
+    # Sort the starts, keeping the original order among ties, and track
+    # the largest original index seen so far
+    order = np.argsort(intervals[:, 0], kind='mergesort')
+    last_index = np.maximum.accumulate(order)
+    positions = np.searchsorted(intervals[order, 0], times, side='right') - 1
+    return last_index[positions]
+
+
+def _bipartite_match(graph, matching=None):
     """Find maximum cardinality matching of a bipartite graph (U,V,E).
     The input format is a dictionary mapping members of U to a list
     of their neighbors in V.
@@ -555,6 +756,10 @@ def _bipartite_match(graph):
     ----------
     graph : dictionary : left-vertex -> list of right vertices
         The input bipartite graph.  Each edge need only be specified once.
+    matching : dictionary : right-vertex -> left vertex or None
+        An optional valid (not necessarily maximal) matching on ``graph``
+        from which to start the search.  This is not modified.
+        (Default value = None)
 
     Returns
     -------
@@ -568,8 +773,14 @@ def _bipartite_match(graph):
     # David Eppstein, UC Irvine, 27 Apr 2002
 
     # initialize greedy matching (redundant, but faster than full search)
-    matching = {}
+    if matching is None:
+        matching = {}
+    else:
+        matching = dict(matching)
+    matched = set(matching.values())
     for u in graph:
+        if u in matched:
+            continue
         for v in graph[u]:
             if v not in matching:
                 matching[v] = u
@@ -710,6 +921,74 @@ def match_events(ref, est, window, distance=None):
     return matching
 
 
+def match_events_sweep(ref, est, windows):
+    """Compute the size of the maximum matching between reference and
+    estimated event times for each of several window sizes.
+
+    This is equivalent to, but more efficient than the following:
+
+    >>> n_matches = [len(match_events(ref, est, window))
+    ...              for window in windows]
+
+    Candidate pairings are computed once, at the largest window.  Windows are
+    then processed in increasing order: since the graph of feasible pairings
+    only grows with the window, each maximum matching is found by augmenting
+    the matching from the previous (smaller) window.
+
+    Parameters
+    ----------
+    ref : np.ndarray, shape=(n,)
+        Array of reference values
+    est : np.ndarray, shape=(m,)
+        Array of estimated values
+    windows : np.ndarray, shape=(k,)
+        Sizes of the windows, in any order.
+
+    Returns
+    -------
+    n_matches : np.ndarray, shape=(k,)
+        ``n_matches[i]`` is the number of matched pairs under ``windows[i]``.
+
+    """
+    ref = np.asarray(ref)
+    est = np.asarray(est)
+    windows = np.atleast_1d(np.asarray(windows, dtype=np.float64))
+
+    n_matches = np.zeros(windows.shape[0], dtype=int)
+    if ref.size == 0 or est.size == 0 or windows.size == 0:
+        return n_matches
+
+    # Compute all candidate pairings once, at the largest window
+    order = np.argsort(windows, kind='mergesort')
+    hit_ref, hit_est = _fast_hit_windows(ref, est, windows[order[-1]])
+    hit_ref = np.asarray(hit_ref, dtype=int)
+    hit_est = np.asarray(hit_est, dtype=int)
+    ref_times = ref[hit_ref]
+    est_times = est[hit_est]
+
+    G = {}
+    matching = {}
+    added = np.zeros(hit_ref.shape[0], dtype=bool)
+    for k in order:
+        window = windows[k]
+        # Use the same comparisons as _fast_hit_windows, so that the
+        # feasible pairings exactly match those of match_events
+        feasible = ((ref_times >= est_times - window) &
+                    (ref_times <= est_times + window))
+        new_hits = np.flatnonzero(feasible & ~added)
+        added[new_hits] = True
+        for ref_i, est_i in zip(hit_ref[new_hits], hit_est[new_hits]):
+            if est_i not in G:
+                G[est_i] = []
+            G[est_i].append(ref_i)
+        # The previous matching is still valid, so grow it
+        if new_hits.size > 0:
+            matching = _bipartite_match(G, matching)
+        n_matches[k] = len(matching)
+
+    return n_matches
+
+
 def _fast_hit_windows(ref, est, window):
     '''Fast calculation of windowed hits for time events.
 
@@ -755,6 +1034,46 @@ def _fast_hit_windows(ref, est, window):
     return hit_ref, hit_est
 
 
+def nearest_distances(x, y):
+    """Compute the distance from each value in ``x`` to its nearest neighbor in
+    ``y``.
+
+    This is equivalent to, but more efficient than the following:
+
+    >>> distances = np.min(np.abs(np.subtract.outer(x, y)), axis=1)
+
+    Rather than computing all pairwise distances, ``y`` is sorted and each
+    value in ``x`` is compared only to its neighbors in ``y``, so time is
+    O((n + m) log m) and memory is O(n + m).
+
+    Parameters
+    ----------
+    x : np.ndarray, shape=(n,)
+        Array of query values
+    y : np.ndarray, shape=(m,)
+        Array of values to search, with ``m > 0``
+
+    Returns
+    -------
+    distances : np.ndarray, shape=(n,)
+        ``distances[i]`` is the smallest ``|x[i] - y[j]|`` over all ``j``
+
+    """
+    x = np.asarray(x)
+    y = np.sort(np.asarray(y))
+
+    if y.size == 0:
+        raise ValueError('Cannot find nearest neighbors in an empty array')
+
+    # Index of the first value in y which is >= each x
+    after = np.searchsorted(y, x, side='left')
+    # The nearest neighbor is either just before or just after
+    before = np.maximum(after - 1, 0)
+    after = np.minimum(after, y.shape[0] - 1)
+
+    return np.minimum(np.abs(x - y[before]), np.abs(x - y[after]))
+
+
 def validate_intervals(intervals):
     """Checks that an (n, 2) interval ndarray is well-formed, and raises errors
     if not.
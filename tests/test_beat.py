@@ -130,3 +130,48 @@ def test_continuity_edge_cases():
         np.array([6., 6.]), np.array([6., 7.])), 0.)
     assert np.allclose(mir_eval.beat.continuity(
         np.array([6., 6.]), np.array([6.5, 7.])), 0.)
+
+
+def test_f_measure_sweep():
+    ref_files = sorted(glob.glob(REF_GLOB))
+    est_files = sorted(glob.glob(EST_GLOB))
+    thresholds = np.linspace(.005, .1, 20)
+    for ref_f, est_f in zip(ref_files, est_files):
+        reference_beats = mir_eval.io.load_events(ref_f)
+        estimated_beats = mir_eval.io.load_events(est_f)
+        scores = mir_eval.beat.f_measure_sweep(reference_beats,
+                                               estimated_beats, thresholds)
+        for n, threshold in enumerate(thresholds):
+            assert scores[n] == mir_eval.beat.f_measure(reference_beats,
+                                                        estimated_beats,
+                                                        threshold)
+
+
+def test_beat_error_histograms():
+    ref_files = sorted(glob.glob(REF_GLOB))
+    est_files = sorted(glob.glob(EST_GLOB))
+    for ref_f, est_f in zip(ref_files, est_files):
+        reference_beats = mir_eval.io.load_events(ref_f)
+        estimated_beats = mir_eval.io.load_events(est_f)
+        forward, backward = mir_eval.beat.beat_error_histograms(
+            reference_beats, estimated_beats)
+        # Each beat falls in exactly one bin
+        assert forward.shape == backward.shape == (41,)
+        assert forward.sum() == estimated_beats.shape[0]
+        assert backward.sum() == reference_beats.shape[0]
+        # Information gain is determined by the histograms
+        norm = np.log2(41)
+        entropy = max(mir_eval.beat._get_entropy(forward),
+                      mir_eval.beat._get_entropy(backward))
+        assert np.allclose(
+            (norm - entropy)/norm,
+            mir_eval.beat.information_gain(reference_beats, estimated_beats),
+            atol=A_TOL)
+
+    # Empty histograms when beat intervals can't be computed
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        forward, backward = mir_eval.beat.beat_error_histograms(
+            np.array([1.]), np.arange(10.), bins=11)
+    assert np.all(forward == 0) and np.all(backward == 0)
+    assert forward.shape == backward.shape == (11,)
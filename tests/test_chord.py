@@ -82,6 +82,15 @@ def test_scale_degree_to_bitmap():
            np.array([0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1]))
 
 
+def test_scale_degree_bitmaps():
+    # The precomputed bitmaps should match scale_degree_to_bitmap
+    for (scale_degree, modulo), bitmap in \
+            mir_eval.chord.SCALE_DEGREE_BITMAPS.items():
+        expected = mir_eval.chord.scale_degree_to_bitmap(scale_degree, modulo)
+        assert np.all(bitmap == expected)
+        assert not bitmap.flags.writeable
+
+
 def test_validate_chord_label():
     valid_labels = ['C', 'Eb:min/5', 'A#:dim7', 'B:maj(*1,*5)/3',
                     'A#:sus4', 'A:(9,11)']
@@ -161,6 +170,42 @@ def test_rotate_bitmaps_to_roots():
     for bitmap, root, expected_bitmap in zip(bitmaps, roots, expected_bitmaps):
         yield (__check_bitmaps, [bitmap], [root], [expected_bitmap])
 
+    # Rotating many bitmaps at once should match rotating them one at a time,
+    # including no-chord roots and 'X' bitmaps
+    rng = np.random.RandomState(43)
+    bitmaps = rng.randint(0, 2, size=(40, 12))
+    bitmaps[-5:] = -1
+    roots = rng.randint(-1, 12, size=40)
+    expected_bitmaps = [mir_eval.chord.rotate_bitmap_to_root(bitmap, root)
+                        for bitmap, root in zip(bitmaps, roots)]
+    yield __check_bitmaps, bitmaps, roots, expected_bitmaps
+
+    # Empty inputs produce an empty output
+    for bitmaps, roots in [([], []), (np.zeros((0, 12)), np.zeros(0))]:
+        ans = mir_eval.chord.rotate_bitmaps_to_roots(bitmaps, roots)
+        yield nose.tools.eq_, ans.size, 0
+
+
+def test_pack_bitmaps():
+    bitmaps = np.array([[1, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0],
+                        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+                        [-1] * 12,
+                        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1]])
+    packed = mir_eval.chord.pack_bitmaps(bitmaps)
+    assert packed.dtype == np.uint16
+    assert np.all(packed == [0b10010001, 0,
+                             mir_eval.chord.X_CHORD_PACKED, 1 << 11])
+
+    # Rotating packed bitmaps should match rotating the bitmaps themselves
+    rng = np.random.RandomState(12)
+    bitmaps = rng.randint(0, 2, size=(50, 12))
+    roots = rng.randint(0, 12, size=50)
+    expected = mir_eval.chord.rotate_bitmaps_to_roots(bitmaps, roots)
+    rotated = mir_eval.chord._ROTATIONS[roots,
+                                        mir_eval.chord.pack_bitmaps(bitmaps)]
+    assert np.all(rotated == mir_eval.chord.pack_bitmaps(expected))
+    assert np.all(mir_eval.chord._POPCOUNT[rotated] == bitmaps.sum(axis=1))
+
 
 def test_encode():
     def __check_encode(label, expected_root, expected_intervals,
@@ -231,6 +276,41 @@ def test_encode_many():
            expected_basses)
 
 
+def test_encode_many_cache():
+    labels = ['C:maj', 'A:min7/b3', 'N', 'C:maj', 'X']
+    cache = mir_eval.chord._ENCODE_CACHE
+    cache_size = mir_eval.chord.ENCODE_CACHE_SIZE
+
+    try:
+        cache.clear()
+        roots, semitones, basses = mir_eval.chord.encode_many(labels)
+        for array in [roots, semitones, basses]:
+            assert array.dtype == int
+
+        # Each distinct label is cached once, and is still encoded correctly
+        assert len(cache) == 4
+        for i, label in enumerate(labels):
+            root, bitmap, bass = mir_eval.chord.encode(label)
+            assert roots[i] == root
+            assert np.all(semitones[i] == bitmap)
+            assert basses[i] == bass
+
+        # The least recently used labels are evicted first
+        mir_eval.chord.ENCODE_CACHE_SIZE = 2
+        mir_eval.chord.encode_many(['C:maj', 'G:maj'])
+        assert len(cache) == 2
+        assert list(cache) == [('C:maj', False, False),
+                               ('G:maj', False, False)]
+
+        # The encoding options are part of the cache key
+        mir_eval.chord.encode_many(['G:maj'], reduce_extended_chords=True)
+        assert list(cache) == [('G:maj', False, False),
+                               ('G:maj', True, False)]
+    finally:
+        mir_eval.chord.ENCODE_CACHE_SIZE = cache_size
+        cache.clear()
+
+
 def __check_one_metric(metric, ref_label, est_label, score):
     ''' Checks that a metric function produces score given ref_label and
     est_label '''
@@ -500,6 +580,62 @@ def test_chord_functions():
                    expected_scores[metric])
 
 
+def test_evaluate_shared_encoding():
+    # evaluate should match calling each comparison function on the same
+    # merged labels
+    ref_f = sorted(glob.glob(REF_GLOB))[0]
+    est_f = sorted(glob.glob(EST_GLOB))[0]
+    ref_intervals, ref_labels = mir_eval.io.load_labeled_intervals(ref_f)
+    est_intervals, est_labels = mir_eval.io.load_labeled_intervals(est_f)
+
+    scores = mir_eval.chord.evaluate(ref_intervals, ref_labels,
+                                     est_intervals, est_labels)
+
+    est_intervals, est_labels = mir_eval.util.adjust_intervals(
+        est_intervals, est_labels, ref_intervals.min(), ref_intervals.max(),
+        mir_eval.chord.NO_CHORD, mir_eval.chord.NO_CHORD)
+    intervals, ref_labels, est_labels = mir_eval.util.merge_labeled_intervals(
+        ref_intervals, ref_labels, est_intervals, est_labels)
+    durations = mir_eval.util.intervals_to_durations(intervals)
+
+    def __check_metric(name):
+        comparisons = getattr(mir_eval.chord, name)(ref_labels, est_labels)
+        expected = mir_eval.chord.weighted_accuracy(comparisons, durations)
+        assert np.allclose(scores[name], expected, atol=A_TOL)
+
+    for name in ['thirds', 'thirds_inv', 'triads', 'triads_inv', 'tetrads',
+                 'tetrads_inv', 'root', 'mirex', 'majmin', 'majmin_inv',
+                 'sevenths', 'sevenths_inv']:
+        yield __check_metric, name
+
+
+def test_unique_label_pairs():
+    ref_labels = ['C:maj', 'C:maj', 'N', 'C:maj', 'A:min']
+    est_labels = ['C:maj', 'C:min', 'N', 'C:maj', 'A:min']
+    weights = np.array([1., 2., 3., 4., 5.])
+
+    ref_pairs, est_pairs, pair_weights = mir_eval.chord.unique_label_pairs(
+        ref_labels, est_labels, weights)
+    pairs = dict(zip(zip(ref_pairs, est_pairs), pair_weights))
+    assert pairs == {('C:maj', 'C:maj'): 5., ('C:maj', 'C:min'): 2.,
+                     ('N', 'N'): 3., ('A:min', 'A:min'): 5.}
+
+    # Scoring the distinct pairs should give the same weighted accuracy
+    def __check_pairs(metric):
+        score = mir_eval.chord.weighted_accuracy(
+            metric(ref_labels, est_labels), weights)
+        pair_score = mir_eval.chord.weighted_accuracy(
+            metric(ref_pairs, est_pairs), pair_weights)
+        assert np.allclose(score, pair_score, atol=A_TOL)
+
+    for metric in [mir_eval.chord.thirds, mir_eval.chord.mirex,
+                   mir_eval.chord.majmin, mir_eval.chord.sevenths_inv]:
+        yield __check_pairs, metric
+
+    yield (__check_exception, mir_eval.chord.unique_label_pairs,
+           (ref_labels, est_labels, weights[:2]), ValueError)
+
+
 def test_quality_to_bitmap():
 
     # Test simple case
@@ -528,3 +664,81 @@ def test_validate():
         # Test that error is thrown on different-length labels
         nose.tools.assert_raises(
             ValueError, mir_eval.chord.validate, [], ['C'])
+
+
+def test_confusion_matrix():
+    for vocabulary, n_classes in [('root', 14), ('majmin', 26),
+                                  ('sevenths', 62)]:
+        classes = mir_eval.chord.confusion_classes(vocabulary)
+        assert len(classes) == n_classes
+        assert classes[-2:] == ['N', 'X']
+
+    ref_intervals = np.array([[0., 2.], [2., 3.], [3., 6.]])
+    ref_labels = ['C:maj', 'A:min7', 'N']
+    est_intervals = np.array([[0., 1.], [1., 4.], [4., 6.]])
+    est_labels = ['C:7', 'A:min', 'C:sus4']
+
+    confusion = mir_eval.chord.confusion_matrix(ref_intervals, ref_labels,
+                                                est_intervals, est_labels)
+    classes = mir_eval.chord.confusion_classes('majmin')
+    expected = np.zeros((len(classes), len(classes)))
+    expected[classes.index('C:maj'), classes.index('C:maj')] = 1.
+    expected[classes.index('C:maj'), classes.index('A:min')] = 1.
+    expected[classes.index('A:min'), classes.index('A:min')] = 1.
+    expected[classes.index('N'), classes.index('A:min')] = 1.
+    expected[classes.index('N'), classes.index('X')] = 2.
+    assert np.allclose(confusion, expected)
+
+    # Confusions accumulate in place
+    mir_eval.chord.confusion_matrix(ref_intervals, ref_labels,
+                                    est_intervals, est_labels,
+                                    confusion=confusion)
+    assert np.allclose(confusion, 2 * expected)
+
+    nose.tools.assert_raises(ValueError, mir_eval.chord.confusion_matrix,
+                             ref_intervals, ref_labels, est_intervals,
+                             est_labels, 'majmin', np.zeros((3, 3)))
+    nose.tools.assert_raises(ValueError, mir_eval.chord.confusion_classes,
+                             'triads')
+
+
+def test_confusion_matrix_accuracy():
+    # The diagonal of the confusion matrix should give the accuracy of the
+    # corresponding comparison function
+    ref_files = sorted(glob.glob(REF_GLOB))
+    est_files = sorted(glob.glob(EST_GLOB))
+
+    def __check_accuracy(ref_intervals, ref_labels, est_intervals,
+                         est_labels, vocabulary):
+        confusion = mir_eval.chord.confusion_matrix(
+            ref_intervals, ref_labels, est_intervals, est_labels, vocabulary)
+        # The final row holds reference chords outside the vocabulary
+        accuracy = (np.trace(confusion[:-1, :-1]) /
+                    np.sum(confusion[:-1]))
+
+        est_intervals, est_labels = mir_eval.util.adjust_intervals(
+            est_intervals, est_labels, ref_intervals.min(),
+            ref_intervals.max(), mir_eval.chord.NO_CHORD,
+            mir_eval.chord.NO_CHORD)
+        intervals, ref_labels, est_labels = \
+            mir_eval.util.merge_labeled_intervals(ref_intervals, ref_labels,
+                                                  est_intervals, est_labels)
+        durations = mir_eval.util.intervals_to_durations(intervals)
+        comparison = getattr(mir_eval.chord, vocabulary)
+        expected = mir_eval.chord.weighted_accuracy(
+            comparison(ref_labels, est_labels), durations)
+        assert np.allclose(accuracy, expected, atol=A_TOL)
+
+    vocabularies = ['root', 'majmin', 'sevenths']
+    for ref_f, est_f in zip(ref_files, est_files):
+        ref_intervals, ref_labels = mir_eval.io.load_labeled_intervals(ref_f)
+        est_intervals, est_labels = mir_eval.io.load_labeled_intervals(est_f)
+        for vocabulary in vocabularies:
+            yield (__check_accuracy, ref_intervals, ref_labels,
+                   est_intervals, est_labels, vocabulary)
+
+    # Estimated 'X' chords against reference no-chords
+    intervals = np.array([[0., 1.], [1., 2.]])
+    for vocabulary in vocabularies:
+        yield (__check_accuracy, intervals, ['N', 'C:maj'],
+               intervals, ['X', 'C:min'], vocabulary)
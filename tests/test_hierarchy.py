@@ -146,3 +146,155 @@ def test_tmeasure_regression():
         # Extract the window parameter
         window = float(re.match('.*output_w=(\d+).json$', out).groups()[0])
         yield __test, window, ref_ints, ref_labs, est_ints, est_labs, target
+
+
+def test_lca_implicit():
+    # Rows of the implicit LCA matrix should match the dense LCA matrix
+    intervals_hier = [np.array([[0, 6], [6, 10]]),
+                      np.array([[0, 3], [3, 6], [6, 10]]),
+                      np.array([[0, 1], [1, 3], [3, 6], [6, 8], [8, 10]])]
+
+    frame_size = 0.5
+    n = 20
+    expected = np.zeros((n, n), dtype=np.uint8)
+    for level, intervals in enumerate(intervals_hier, 1):
+        for start, end in (intervals / frame_size).astype(int):
+            expected[start:end, start:end] = level
+
+    lca = mir_eval.hierarchy._lca(intervals_hier, frame_size)
+    assert lca.shape == (len(intervals_hier), n)
+
+    for query in range(n):
+        for results in [slice(0, n), slice(max(0, query - 3), query + 3)]:
+            row = mir_eval.hierarchy._lca_row(lca, query, results)
+            assert row.dtype == np.uint8
+            assert np.all(row == expected[query, results])
+
+
+def test_gauc_triple_counting():
+    # The histogram-based triple counts should exactly match
+    # a direct comparison of all pairs of results
+    def __gauc_outer(ref_lca, est_lca, transitive, window):
+        n = ref_lca.shape[1]
+        if window is None:
+            window = n
+        score = 0.0
+        num_frames = 0
+        for query in range(n):
+            results = slice(max(0, query - window), min(n, query + window))
+            ref_score = mir_eval.hierarchy._lca_row(ref_lca, query, results)
+            est_score = mir_eval.hierarchy._lca_row(est_lca, query, results)
+            if transitive:
+                ref_rank = np.greater.outer(ref_score, ref_score)
+            else:
+                ref_rank = np.equal.outer(ref_score, ref_score + 1)
+            est_rank = np.greater.outer(est_score, est_score)
+            idx = min(query, window)
+            ref_rank[idx, :] = False
+            ref_rank[:, idx] = False
+            normalizer = float(ref_rank.sum())
+            if normalizer > 0:
+                n_correct = np.sum(np.logical_and(ref_rank, est_rank))
+                score += n_correct / normalizer
+                num_frames += 1
+        if num_frames:
+            score /= float(num_frames)
+        else:
+            score = 0.0
+        return score
+
+    def __random_hier(rng, duration, n_levels):
+        boundaries = set()
+        hier = []
+        for _ in range(n_levels):
+            boundaries |= set(rng.randint(1, duration, size=3))
+            times = np.asarray([0] + sorted(boundaries) + [duration])
+            hier.append(np.stack([times[:-1], times[1:]], axis=1))
+        return hier
+
+    def __test(ref_lca, est_lca, transitive, window):
+        score = mir_eval.hierarchy._gauc(ref_lca, est_lca, transitive, window)
+        assert score == __gauc_outer(ref_lca, est_lca, transitive, window)
+
+    rng = np.random.RandomState(20)
+    for _ in range(5):
+        ref_lca = mir_eval.hierarchy._lca(__random_hier(rng, 30, 3), 0.5)
+        est_lca = mir_eval.hierarchy._lca(__random_hier(rng, 30, 2), 0.5)
+        for transitive in [False, True]:
+            for window in [1, 4, 15, None]:
+                yield __test, ref_lca, est_lca, transitive, window
+
+
+def test_tmeasure_n_jobs():
+    # Splitting query frames across processes should not change the scores
+    ref = [np.array([[0, 30]]),
+           np.array([[0, 10], [10, 22], [22, 30]]),
+           np.array([[0, 4], [4, 10], [10, 16], [16, 22], [22, 30]])]
+    est = [np.array([[0, 30]]),
+           np.array([[0, 14], [14, 30]]),
+           np.array([[0, 7], [7, 14], [14, 25], [25, 30]])]
+
+    def __test(window, transitive, n_jobs):
+        scores = mir_eval.hierarchy.tmeasure(ref, est, window=window,
+                                             transitive=transitive)
+        scores_jobs = mir_eval.hierarchy.tmeasure(ref, est, window=window,
+                                                  transitive=transitive,
+                                                  n_jobs=n_jobs)
+        assert scores == scores_jobs
+
+    for window in [5, None]:
+        for transitive in [False, True]:
+            for n_jobs in [1, 2, 3]:
+                yield __test, window, transitive, n_jobs
+
+    yield (raises(ValueError)(mir_eval.hierarchy.tmeasure),
+           ref, est, False, 15.0, 0.1, 1.0, 0)
+
+
+def test_evaluate_shared_lca():
+    # evaluate should match separate calls to tmeasure in each mode
+    ref_i = [[[0, 30], [30, 60]], [[0, 15], [15, 30], [30, 45], [45, 60]]]
+    est_i = [[[0, 45], [45, 60]], [[0, 15], [15, 30], [30, 45], [45, 60]]]
+    ref_l = [['A', 'B'], ['a', 'b', 'a', 'c']]
+    est_l = [['A', 'B'], ['a', 'a', 'b', 'b']]
+
+    ref_i = [np.asarray(_, dtype=float) for _ in ref_i]
+    est_i = [np.asarray(_, dtype=float) for _ in est_i]
+
+    scores = mir_eval.hierarchy.evaluate(ref_i, ref_l, est_i, est_l,
+                                         window=5, beta=0.5)
+
+    for transitive, mode in [(False, 'reduced'), (True, 'full')]:
+        expected = mir_eval.hierarchy.tmeasure(ref_i, est_i,
+                                               transitive=transitive,
+                                               window=5, beta=0.5)
+        assert scores['T-Precision ' + mode] == expected[0]
+        assert scores['T-Recall ' + mode] == expected[1]
+        assert scores['T-Measure ' + mode] == expected[2]
+
+
+def test_lca_band():
+    # Rows of the banded LCA matrix should match rows of the implicit one
+    intervals_hier = [np.array([[0, 6], [6, 10]]),
+                      np.array([[0, 3], [3, 6], [6, 10]]),
+                      np.array([[0, 1], [1, 3], [3, 6], [6, 8], [8, 10]])]
+
+    lca = mir_eval.hierarchy._lca(intervals_hier, 0.5)
+    n = lca.shape[1]
+
+    def __test(window):
+        band = mir_eval.hierarchy._lca_band(lca, window)
+        assert band.shape == (n, 2 * window)
+        assert band.dtype == np.uint8
+        for query in range(n):
+            for k in range(2 * window):
+                result = query - window + k
+                if 0 <= result < n:
+                    expected = mir_eval.hierarchy._lca_row(
+                        lca, query, slice(result, result + 1))[0]
+                else:
+                    expected = 0
+                assert band[query, k] == expected
+
+    for window in [1, 3, 10, 25]:
+        yield __test, window
@@ -4,6 +4,7 @@ Unit tests for mir_eval.melody
 '''
 
 import numpy as np
+import scipy.interpolate
 import json
 import nose.tools
 import mir_eval
@@ -60,6 +61,27 @@ def test_resample_melody_series():
     assert np.allclose(res_voicing, expected_voicing)
 
 
+def test_interpolate():
+    # Direct interpolation should exactly match scipy.interpolate.interp1d
+    rng = np.random.RandomState(0)
+    times = np.cumsum(rng.choice([0.01, 0.02, 0.0058], size=50))
+    values = rng.rand(50) * (rng.rand(50) > 0.3)
+    times_new = np.concatenate([np.linspace(times[0], times[-1], 77),
+                                times, (times[1:] + times[:-1]) / 2.0])
+    times_new.sort()
+
+    def __test(kind):
+        expected = scipy.interpolate.interp1d(times, values, kind)(times_new)
+        result = mir_eval.melody._interpolate(times, values, times_new, kind)
+        assert np.array_equal(result, expected)
+
+    for kind in ['linear', 'zero', 'nearest', 'cubic']:
+        yield __test, kind
+
+    yield (nose.tools.raises(ValueError)(mir_eval.melody._interpolate),
+           times, values, times_new - 1.0, 'linear')
+
+
 def test_resample_melody_series_same_times():
     # Check the case where the time bases are identical
     times = np.array([0.0, 0.1, 0.2, 0.3])
@@ -199,3 +221,30 @@ def test_melody_functions():
             # This is a simple hack to make nosetest's messages more useful
             yield (__check_score, sco_f, metric, scores[metric],
                    expected_scores[metric])
+
+
+def test_evaluate_shared_errors():
+    # evaluate should match separate calls to each metric function
+    ref_file = sorted(glob.glob(REF_GLOB))[0]
+    est_file = sorted(glob.glob(EST_GLOB))[0]
+    ref_time, ref_freq = mir_eval.io.load_time_series(ref_file)
+    est_time, est_freq = mir_eval.io.load_time_series(est_file)
+    (ref_v, ref_c,
+     est_v, est_c) = mir_eval.melody.to_cent_voicing(ref_time, ref_freq,
+                                                     est_time, est_freq)
+
+    def __test(cent_tolerance):
+        scores = mir_eval.melody.evaluate(ref_time, ref_freq,
+                                          est_time, est_freq,
+                                          cent_tolerance=cent_tolerance)
+        assert ((scores['Voicing Recall'], scores['Voicing False Alarm']) ==
+                mir_eval.melody.voicing_measures(ref_v, est_v))
+        for metric, function in [
+                ('Raw Pitch Accuracy', mir_eval.melody.raw_pitch_accuracy),
+                ('Raw Chroma Accuracy', mir_eval.melody.raw_chroma_accuracy),
+                ('Overall Accuracy', mir_eval.melody.overall_accuracy)]:
+            assert scores[metric] == function(ref_v, ref_c, est_v, est_c,
+                                              cent_tolerance=cent_tolerance)
+
+    for cent_tolerance in [10, 50, 100]:
+        yield __test, cent_tolerance
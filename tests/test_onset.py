@@ -77,3 +77,18 @@ def test_onset_functions():
             # This is a simple hack to make nosetest's messages more useful
             yield (__check_score, sco_f, metric, scores[metric],
                    expected_scores[metric])
+
+
+def test_f_measure_sweep():
+    ref_files = sorted(glob.glob(REF_GLOB))
+    est_files = sorted(glob.glob(EST_GLOB))
+    windows = np.linspace(.005, .1, 20)
+    for ref_f, est_f in zip(ref_files, est_files):
+        reference_onsets = mir_eval.io.load_events(ref_f)
+        estimated_onsets = mir_eval.io.load_events(est_f)
+        F, P, R = mir_eval.onset.f_measure_sweep(reference_onsets,
+                                                 estimated_onsets, windows)
+        for n, window in enumerate(windows):
+            expected = mir_eval.onset.f_measure(reference_onsets,
+                                                estimated_onsets, window)
+            assert (F[n], P[n], R[n]) == expected
@@ -173,3 +173,178 @@ def test_segment_functions():
         yield (__unit_test_permuted_segments, sco_f,
                ref_intervals, ref_labels,
                est_intervals, est_labels, scores)
+
+
+def test_pair_counts():
+    # Pair counts from the contingency matrix should match brute-force
+    # counts over the label agreement matrices
+    np.random.seed(0)
+    y_ref = np.random.randint(0, 5, size=200)
+    y_est = np.random.randint(0, 7, size=200)
+
+    agree_ref = np.equal.outer(y_ref, y_ref)
+    agree_est = np.equal.outer(y_est, y_est)
+    expected = ((agree_ref.sum() - len(y_ref)) / 2.0,
+                (agree_est.sum() - len(y_est)) / 2.0,
+                ((agree_ref & agree_est).sum() - len(y_ref)) / 2.0)
+
+    contingency = mir_eval.segment._contingency_matrix(y_ref, y_est)
+    assert mir_eval.segment._pair_counts(contingency) == expected
+
+
+def test_expected_mutual_info_score():
+    # Compare against a direct evaluation of the EMI summation
+    from math import lgamma, log, exp
+    np.random.seed(0)
+    y_ref = np.random.randint(0, 4, size=60)
+    y_est = np.random.randint(0, 6, size=60)
+    contingency = mir_eval.segment._contingency_matrix(y_ref, y_est)
+
+    N = len(y_ref)
+    expected = 0.
+    for a in contingency.sum(axis=1):
+        for b in contingency.sum(axis=0):
+            for nij in range(max(1, a + b - N), min(a, b) + 1):
+                expected += (nij / float(N) * log(N * nij / float(a * b)) *
+                             exp(lgamma(a + 1) + lgamma(b + 1) +
+                                 lgamma(N - a + 1) + lgamma(N - b + 1) -
+                                 lgamma(N + 1) - lgamma(nij + 1) -
+                                 lgamma(a - nij + 1) - lgamma(b - nij + 1) -
+                                 lgamma(N - a - b + nij + 1)))
+
+    emi = mir_eval.segment._expected_mutual_info_score(contingency, N)
+    assert np.allclose(emi, expected, atol=A_TOL)
+
+
+def test_evaluate_shared_frames():
+    # evaluate computes the frame clustering metrics from one shared
+    # contingency matrix; make sure it agrees with the individual metrics
+    ref_f = sorted(glob.glob(REF_GLOB))[0]
+    est_f = sorted(glob.glob(EST_GLOB))[0]
+    ref_intervals, ref_labels = mir_eval.io.load_labeled_intervals(ref_f)
+    est_intervals, est_labels = mir_eval.io.load_labeled_intervals(est_f)
+    ref_intervals, ref_labels = mir_eval.util.adjust_intervals(
+        ref_intervals, ref_labels, t_min=0.0)
+    est_intervals, est_labels = mir_eval.util.adjust_intervals(
+        est_intervals, est_labels, t_min=0.0, t_max=ref_intervals.max())
+
+    kwargs = dict(frame_size=0.25, beta=0.5)
+    scores = mir_eval.segment.evaluate(ref_intervals, ref_labels,
+                                       est_intervals, est_labels, **kwargs)
+    args = (ref_intervals, ref_labels, est_intervals, est_labels)
+    expected = (mir_eval.segment.pairwise(*args, **kwargs) +
+                (mir_eval.segment.rand_index(*args, frame_size=0.25),
+                 mir_eval.segment.ari(*args, frame_size=0.25)) +
+                mir_eval.segment.mutual_information(*args, frame_size=0.25) +
+                mir_eval.segment.nce(*args, **kwargs) +
+                mir_eval.segment.vmeasure(*args, **kwargs))
+    actual = tuple(scores[metric] for metric in [
+        'Pairwise Precision', 'Pairwise Recall', 'Pairwise F-measure',
+        'Rand Index', 'Adjusted Rand Index', 'Mutual Information',
+        'Adjusted Mutual Information', 'Normalized Mutual Information',
+        'NCE Over', 'NCE Under', 'NCE F-measure',
+        'V Precision', 'V Recall', 'V-measure'])
+    assert np.allclose(actual, expected, atol=A_TOL)
+
+
+def test_continuous_time():
+    # Two equal-length reference segments, one estimated segment:
+    # half of all pairs of time instants agree in the reference
+    ref_intervals = np.array([[0., 2.], [2., 4.]])
+    est_intervals = np.array([[0., 4.]])
+    precision, recall, f = mir_eval.segment.pairwise(
+        ref_intervals, ['A', 'B'], est_intervals, ['X'], frame_size=None)
+    assert np.allclose([precision, recall], [0.5, 1.0])
+    assert np.allclose(mir_eval.segment.rand_index(
+        ref_intervals, ['A', 'B'], est_intervals, ['X'], frame_size=None),
+        0.5)
+
+    # End times which are only approximately equal are accepted, as in the
+    # sampled metrics
+    for end in [4.0000001, 3.9999999]:
+        est_intervals = np.array([[0., 1.], [1., end]])
+        precision, recall, f = mir_eval.segment.pairwise(
+            ref_intervals, ['A', 'B'], est_intervals, ['X', 'Y'],
+            frame_size=None)
+        assert np.allclose([precision, recall], [0.6, 0.75])
+
+    # Continuous-time metrics are the limit of the sampled ones as the frame
+    # size goes to zero
+    ref_f = sorted(glob.glob(REF_GLOB))[0]
+    est_f = sorted(glob.glob(EST_GLOB))[0]
+    ref_intervals, ref_labels = mir_eval.io.load_labeled_intervals(ref_f)
+    est_intervals, est_labels = mir_eval.io.load_labeled_intervals(est_f)
+    exact_scores = mir_eval.segment.evaluate(ref_intervals, ref_labels,
+                                             est_intervals, est_labels,
+                                             frame_size=None)
+    fine_scores = mir_eval.segment.evaluate(ref_intervals, ref_labels,
+                                            est_intervals, est_labels,
+                                            frame_size=0.001)
+    for metric in exact_scores:
+        assert np.allclose(exact_scores[metric], fine_scores[metric],
+                           atol=1e-3)
+
+
+def test_detection_multiple_windows():
+    ref_f = sorted(glob.glob(REF_GLOB))[0]
+    est_f = sorted(glob.glob(EST_GLOB))[0]
+    ref_intervals, _ = mir_eval.io.load_labeled_intervals(ref_f)
+    est_intervals, _ = mir_eval.io.load_labeled_intervals(est_f)
+    windows = [3.0, 0.1, 0.5, 1.0]
+    for trim in [False, True]:
+        P, R, F = mir_eval.segment.detection(ref_intervals, est_intervals,
+                                             window=windows, trim=trim)
+        for n, window in enumerate(windows):
+            expected = mir_eval.segment.detection(ref_intervals,
+                                                  est_intervals,
+                                                  window=window, trim=trim)
+            assert (P[n], R[n], F[n]) == expected
+
+
+def test_detection_empty_windows():
+    # With empty inputs, each score gets its own array
+    ref_intervals = np.array([[0., 1.], [1., 2.]])
+    est_intervals = np.zeros((0, 2))
+    with warnings.catch_warnings(record=True):
+        warnings.simplefilter('always')
+        P, R, F = mir_eval.segment.detection(ref_intervals, est_intervals,
+                                             window=[0.5, 3.0])
+        P[0] = 1.
+        assert R[0] == 0. and F[0] == 0.
+        scores = mir_eval.segment.detection(ref_intervals, est_intervals)
+        assert all(type(score) is float for score in scores)
+
+
+def test_evaluate_boundary_scores_are_float():
+    ref_f = sorted(glob.glob(REF_GLOB))[0]
+    est_f = sorted(glob.glob(EST_GLOB))[0]
+    ref_intervals, ref_labels = mir_eval.io.load_labeled_intervals(ref_f)
+    est_intervals, est_labels = mir_eval.io.load_labeled_intervals(est_f)
+    scores = mir_eval.segment.evaluate(ref_intervals, ref_labels,
+                                       est_intervals, est_labels)
+    for window in ['0.5', '3.0']:
+        for metric in ['Precision', 'Recall', 'F-measure']:
+            assert type(scores['{}@{}'.format(metric, window)]) is float
+
+
+def test_evaluate_kwargs_match_metrics():
+    # evaluate resolves its options the same way the metric functions do
+    ref_intervals = np.array([[0., 2.], [2., 5.], [5., 6.], [6., 10.]])
+    ref_labels = ['A', 'B', 'A', 'C']
+    est_intervals = np.array([[0., 3.], [3., 4.5], [4.5, 10.]])
+    est_labels = ['a', 'b', 'a']
+    for kwargs in [{}, {'beta': 0.5, 'frame_size': 0.25, 'marginal': True}]:
+        scores = mir_eval.segment.evaluate(ref_intervals, ref_labels,
+                                           est_intervals, est_labels,
+                                           **kwargs)
+        for names, metric in [
+                (['Pairwise Precision', 'Pairwise Recall',
+                  'Pairwise F-measure'], mir_eval.segment.pairwise),
+                (['NCE Over', 'NCE Under', 'NCE F-measure'],
+                 mir_eval.segment.nce),
+                (['V Precision', 'V Recall', 'V-measure'],
+                 mir_eval.segment.vmeasure)]:
+            expected = mir_eval.util.filter_kwargs(
+                metric, ref_intervals, ref_labels, est_intervals,
+                est_labels, **kwargs)
+            assert np.allclose([scores[name] for name in names], expected)
@@ -31,6 +31,22 @@ def test_interpolate_intervals_gap():
             expected_ans)
 
 
+def test_interpolate_intervals_order():
+    """Check that the last interval listed wins for unsorted and nested
+    intervals.
+    """
+    # Unsorted intervals sharing a boundary
+    intervals = np.array([[1.0, 2.0], [0.0, 1.0]])
+    assert (util.interpolate_intervals(intervals, ['a', 'b'], [0.5, 1.0, 1.5])
+            == ['b', 'b', 'a'])
+
+    # Nested intervals
+    intervals = np.array([[0.0, 10.0], [2.0, 3.0]])
+    assert (util.interpolate_intervals(intervals, ['a', 'b'],
+                                       [1.0, 2.5, 5.0, 11.0], 'N') ==
+            ['a', 'b', 'a', 'N'])
+
+
 @nose.tools.raises(ValueError)
 def test_interpolate_intervals_badtime():
     """Check that interpolate_intervals throws an exception if
@@ -64,6 +80,75 @@ def test_intervals_to_samples():
     assert result[1] == expected_labels
 
 
+def test_interpolate_interval_indices():
+    """Check that interval label indices are interpolated properly, with
+    gaps, shared boundaries and out-of-range values.
+    """
+    intervals = np.array([[0.5, 1.0], [1.0, 2.0], [2.5, 3.0]])
+    time_points = [0.0, 0.75, 1.0, 1.75, 2.25, 2.75, 3.5]
+    result = util.interpolate_interval_indices(intervals, [4, 2, 7],
+                                               time_points)
+    assert result.dtype == np.int32
+    assert np.all(result == [-1, 4, 2, 2, -1, 7, -1])
+
+    # In reverse order, the shared boundary goes to the last interval listed
+    result = util.interpolate_interval_indices(intervals[::-1], [7, 2, 4],
+                                               time_points, fill_index=9)
+    assert np.all(result == [9, 4, 4, 2, 9, 7, 9])
+
+
+def test_intervals_to_sample_indices():
+    """Check that sampled label indices match indexing the sampled labels.
+    """
+    labels = ['B', 'a', 'b', 'A']
+    intervals = np.array([[0, 1.3], [1.3, 2.05], [2.05, 3.5], [3.5, 7.7]])
+
+    def __test(offset, sample_size, case_sensitive):
+        times, labs = util.intervals_to_samples(
+            intervals, labels, offset=offset, sample_size=sample_size)
+        times_i, indices, index_to_label = util.intervals_to_sample_indices(
+            intervals, labels, offset=offset, sample_size=sample_size,
+            case_sensitive=case_sensitive)
+        assert np.all(times_i == times)
+        assert indices.dtype == np.int32
+        if not case_sensitive:
+            labs = [lab if lab is None else lab.lower() for lab in labs]
+        # Out-of-range samples are filled with -1
+        index_to_label[-1] = None
+        assert [index_to_label[i] for i in indices] == labs
+
+    for offset in [0, 0.25]:
+        for sample_size in [0.1, 0.5, 0.013]:
+            for case_sensitive in [False, True]:
+                yield __test, offset, sample_size, case_sensitive
+
+
+def test_index_labels():
+    """Check that labels are indexed in sorted order, optionally against a
+    shared vocabulary.
+    """
+    labels = ['b', 'A', 'B', 'a', 'c']
+
+    indices, index_to_label = util.index_labels(labels)
+    assert indices == [1, 0, 1, 0, 2]
+    assert index_to_label == {0: 'a', 1: 'b', 2: 'c'}
+
+    indices, index_to_label = util.index_labels(np.asarray(labels),
+                                                case_sensitive=True)
+    assert indices == [3, 0, 1, 2, 4]
+    assert index_to_label == {0: 'A', 1: 'B', 2: 'a', 3: 'b', 4: 'c'}
+
+    # Index a subset of the labels against the full vocabulary
+    vocabulary = util.index_labels(labels)[1]
+    indices, index_to_label = util.index_labels(['C', 'a'],
+                                                vocabulary=vocabulary)
+    assert indices == [2, 0]
+    assert index_to_label is vocabulary
+
+    nose.tools.assert_raises(ValueError, util.index_labels, ['a', 'd'],
+                             vocabulary=vocabulary)
+
+
 def test_intersect_files():
     """Check that two non-identical yield correct results.
     """
@@ -109,6 +194,14 @@ def test_merge_labeled_intervals():
     assert new_y_labels == expected_y_labels
     assert new_intvs.tolist() == expected_intvs
 
+    # Among intervals with the same start, the last one listed wins
+    z_intvs = np.insert(x_intvs, 3, [2.537, 2.537], axis=0)
+    z_labels = ['A', 'B', 'C', 'E', 'D']
+    new_intvs, new_z_labels, _ = util.merge_labeled_intervals(
+        z_intvs, z_labels, y_intvs, y_labels)
+    assert new_intvs.tolist() == expected_intvs
+    assert new_z_labels == ['A', 'B', 'B', 'B', 'E', 'D', 'D']
+
     # Check that invalid inputs raise a ValueError
     y_intvs[-1, -1] = 10.0
     nose.tools.assert_raises(ValueError, util.merge_labeled_intervals, x_intvs,
@@ -216,6 +309,30 @@ def test_match_events():
     assert actual == expected
 
 
+def test_match_events_sweep():
+    ref = [1., 2., 3.]
+    est = [1.1, 6., 1.9, 5., 10.]
+    windows = [0.5, 0.05, 3., 0.1, 0.]
+    expected = [len(mir_eval.util.match_events(ref, est, window))
+                for window in windows]
+    actual = mir_eval.util.match_events_sweep(ref, est, windows)
+    assert np.all(actual == expected)
+
+    # Random events with many overlapping candidate pairings
+    np.random.seed(0)
+    ref = np.sort(np.random.uniform(0, 10, 100))
+    est = np.sort(np.random.uniform(0, 10, 120))
+    windows = np.linspace(0.005, 0.5, 50)
+    expected = [len(mir_eval.util.match_events(ref, est, window))
+                for window in windows]
+    actual = mir_eval.util.match_events_sweep(ref, est, windows)
+    assert np.all(actual == expected)
+
+    # Empty inputs produce no matches
+    actual = mir_eval.util.match_events_sweep([], est, windows)
+    assert np.all(actual == 0)
+
+
 def test_fast_hit_windows():
 
     ref = [1., 2., 3.]
@@ -228,6 +345,24 @@ def test_fast_hit_windows():
     assert np.all(est_fast == est_slow)
 
 
+def test_nearest_distances():
+    x = [1., 2., 3., -4., 20.]
+    y = [1.1, 6., 1.9, 5., 10.]
+    expected = np.min(np.abs(np.subtract.outer(x, y)), axis=1)
+    actual = mir_eval.util.nearest_distances(x, y)
+    assert np.all(actual == expected)
+
+    np.random.seed(0)
+    x = np.random.uniform(0, 10, 100)
+    y = np.random.uniform(0, 10, 37)
+    expected = np.min(np.abs(np.subtract.outer(x, y)), axis=1)
+    actual = mir_eval.util.nearest_distances(x, y)
+    assert np.all(actual == expected)
+
+    nose.tools.assert_raises(ValueError, mir_eval.util.nearest_distances,
+                             x, [])
+
+
 def test_validate_intervals():
     # Test for ValueError when interval shape is invalid
     nose.tools.assert_raises(